@@ -0,0 +1,180 @@
+"""
+Headless Connect Four game loop, without the PettingZoo AEC wrapper
+
+Agents receive the same (6, 7, 2) int8 observation seen by the player to
+move (channel 0 = its pieces, row 0 at the top) and the same (7,) int8
+action mask as with connect_four_v3. With verify=True the game is replayed
+move by move in connect_four_v3 and every observation, mask and reward is
+compared.
+"""
+
+import random
+import time
+import numpy as np
+from pettingzoo.classic import connect_four_v3
+from vector_env import AGENTS, COLS, ROWS, AgentSpaces, cell_bit, has_four, perspective
+
+
+class HeadlessConnectFour(AgentSpaces):
+    """
+    One Connect Four game, with the layout, win check and agent attributes
+    of vector_env so that both environments play by the same rules
+    """
+    def __init__(self, seed=None):
+        """
+        Parameters:
+            seed: seed of the action spaces
+        """
+        super().__init__()
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """
+        Start a new game
+
+        Parameters:
+            seed: seed of the action spaces, None to keep their state
+        """
+        if seed is not None:
+            self.seed_action_spaces(seed)
+        self.board = np.zeros((ROWS, COLS, 2), dtype=np.int8)
+        self.bits = [0, 0]
+        self.heights = [0] * COLS
+        self.current = 0
+        self.moves = 0
+        self.winner = None
+        self.done = False
+
+    def observe(self):
+        """
+        Observation and action mask of the player to move
+
+        Returns:
+            tuple: (observation (6, 7, 2), action mask (7,)) as int8 arrays
+        """
+        mask = np.array([height < ROWS for height in self.heights], dtype=np.int8)
+        return perspective(self.board, self.current), mask
+
+    def step(self, col):
+        """
+        Drop a piece of the player to move
+
+        Parameters:
+            col: column, must not be full
+
+        Returns:
+            bool: True if the game is over
+
+        Raises:
+            ValueError: if the game is over or the column is invalid or full
+        """
+        if self.done or not 0 <= col < COLS or self.heights[col] >= ROWS:
+            raise ValueError(f"illegal move {col}")
+        row = ROWS - 1 - self.heights[col]
+        self.board[row, col, self.current] = 1
+        self.bits[self.current] |= 1 << cell_bit(row, col)
+        self.heights[col] += 1
+        self.moves += 1
+        if has_four(self.bits[self.current]):
+            self.winner = self.current
+            self.done = True
+        elif self.moves == ROWS * COLS:
+            self.done = True
+        self.current = 1 - self.current
+        return self.done
+
+    def rewards(self):
+        """
+        Final rewards, as in connect_four_v3
+
+        Returns:
+            dict: reward of player_0 and player_1
+        """
+        if self.winner is None:
+            return {"player_0": 0, "player_1": 0}
+        return {AGENTS[self.winner]: 1, AGENTS[1 - self.winner]: -1}
+
+
+def play_headless(agent_classes, seed=None, verify=False):
+    """
+    Play one game with the headless loop
+
+    Parameters:
+        agent_classes: [AgentClassPlayer0, AgentClassPlayer1]
+        seed: seed of the action spaces and the random modules, None for no seeding
+        verify: if True, also play every move in connect_four_v3 and check that it agrees
+
+    Returns:
+        dict: winner (0, 1 or None for a draw) and moves (list of columns)
+
+    Raises:
+        AssertionError: if verify finds a difference with connect_four_v3
+    """
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+    game = HeadlessConnectFour(seed)
+    agents = [Agent(game, player_name=name) for Agent, name in zip(agent_classes, AGENTS)]
+
+    reference = None
+    if verify:
+        reference = connect_four_v3.env(render_mode=None)
+        reference.reset(seed=seed)
+
+    moves = []
+    while not game.done:
+        observation, mask = game.observe()
+        if reference is not None:
+            obs, _, termination, truncation, _ = reference.last()
+            assert reference.agent_selection == AGENTS[game.current], "wrong player to move"
+            assert not (termination or truncation), "game over in connect_four_v3"
+            assert np.array_equal(obs["observation"], observation), f"observation differs after {moves}"
+            assert np.array_equal(obs["action_mask"], mask), f"action mask differs after {moves}"
+        action = int(agents[game.current].choose_action(observation, 0, False, False, {}, mask))
+        game.step(action)
+        moves.append(action)
+        if reference is not None:
+            reference.step(action)
+
+    if reference is not None:
+        assert all(reference.terminations.values()), f"game not over in connect_four_v3 after {moves}"
+        assert reference.rewards == game.rewards(), f"rewards differ after {moves}"
+        reference.close()
+    return {"winner": game.winner, "moves": moves}
+
+
+def benchmark_loops(agent_classes, num_games=200, seed=0):
+    """
+    Time the same games with the headless loop and with connect_four_v3
+
+    Parameters:
+        agent_classes: [AgentClassPlayer0, AgentClassPlayer1]
+        num_games: number of games of each loop
+        seed: seed of the first game
+
+    Returns:
+        dict: headless and pettingzoo seconds per game, and the speedup
+    """
+    start = time.perf_counter()
+    for game in range(num_games):
+        play_headless(agent_classes, seed + game)
+    headless = (time.perf_counter() - start) / num_games
+
+    start = time.perf_counter()
+    for game in range(num_games):
+        random.seed(seed + game)
+        np.random.seed(seed + game)
+        env = connect_four_v3.env(render_mode=None)
+        env.reset(seed=seed + game)
+        agents = {name: Agent(env, player_name=name) for Agent, name in zip(agent_classes, AGENTS)}
+        for agent_name in env.agent_iter():
+            obs, reward, termination, truncation, info = env.last()
+            if termination or truncation:
+                env.step(None)
+                continue
+            env.step(agents[agent_name].choose_action(obs["observation"], reward, termination, truncation, info,
+                                                      obs["action_mask"]))
+        env.close()
+    pettingzoo = (time.perf_counter() - start) / num_games
+
+    return {"headless": headless, "pettingzoo": pettingzoo, "speedup": pettingzoo / headless}
@@ -0,0 +1,206 @@
+"""
+Compact binary records of played games
+
+A file starts with the magic b"C4GR" and a version, followed by the games
+one after another. A game is a fixed header (size, seed, winner, number
+of moves, name lengths, timing flag), the names of the agents playing
+player_0 and player_1 in UTF-8, the moves packed at 3 bits per move, and
+optionally one float32 thinking time in seconds per move.
+
+The writer only appends, so tournaments can stream their games to it;
+the reader maps the file in memory and decodes one game at a time.
+"""
+
+import mmap
+import os
+import struct
+from collections import namedtuple
+
+MAGIC = b"C4GR"
+VERSION = 1
+FILE_HEADER = struct.Struct("<4sH")
+# record size in bytes, seed, winner (0, 1 or -1 for a draw), moves, name lengths, has timings
+RECORD_HEADER = struct.Struct("<IIbBBBB")
+TIMING = struct.Struct("<f")
+
+GameRecord = namedtuple("GameRecord", ["player_0", "player_1", "seed", "winner", "moves", "timings"])
+
+
+def pack_moves(moves):
+    """
+    Pack columns (0 to 6) at 3 bits per move
+
+    Parameters:
+        moves: sequence of columns
+
+    Returns:
+        bytes: ceil(3 * len(moves) / 8) bytes, first move in the lowest bits
+    """
+    value = 0
+    for i, col in enumerate(moves):
+        if not 0 <= col < 7:
+            raise ValueError(f"invalid column {col}")
+        value |= col << (3 * i)
+    return value.to_bytes((3 * len(moves) + 7) // 8, "little")
+
+
+def unpack_moves(data, count):
+    """
+    Inverse of pack_moves
+
+    Parameters:
+        data: packed bytes
+        count: number of moves
+
+    Returns:
+        tuple: columns
+    """
+    value = int.from_bytes(data, "little")
+    return tuple((value >> (3 * i)) & 7 for i in range(count))
+
+
+def encode_record(player_0, player_1, seed, winner, moves, timings=None):
+    """
+    Bytes of one game
+
+    Parameters:
+        player_0: id of the agent playing first
+        player_1: id of the agent playing second
+        seed: seed of the game (32-bit)
+        winner: 0 or 1 for the winning player, None for a draw
+        moves: columns played
+        timings: seconds taken by every move, None to leave them out
+
+    Returns:
+        bytes
+    """
+    names = [player_0.encode(), player_1.encode()]
+    if any(len(name) > 255 for name in names):
+        raise ValueError("agent ids are limited to 255 bytes")
+    if timings is not None and len(timings) != len(moves):
+        raise ValueError("one timing per move is needed")
+    body = names[0] + names[1] + pack_moves(moves)
+    if timings is not None:
+        body += b"".join(TIMING.pack(t) for t in timings)
+    header = RECORD_HEADER.pack(RECORD_HEADER.size + len(body), seed, -1 if winner is None else winner,
+                                len(moves), len(names[0]), len(names[1]), timings is not None)
+    return header + body
+
+
+def decode_record(buffer, offset):
+    """
+    Decode the game starting at `offset`
+
+    Returns:
+        tuple: (GameRecord, offset of the next game)
+    """
+    size, seed, winner, count, len_0, len_1, timed = RECORD_HEADER.unpack_from(buffer, offset)
+    position = offset + RECORD_HEADER.size
+    player_0 = bytes(buffer[position:position + len_0]).decode()
+    position += len_0
+    player_1 = bytes(buffer[position:position + len_1]).decode()
+    position += len_1
+    packed = (3 * count + 7) // 8
+    moves = unpack_moves(buffer[position:position + packed], count)
+    position += packed
+    timings = None
+    if timed:
+        timings = tuple(TIMING.unpack_from(buffer, position + i * TIMING.size)[0] for i in range(count))
+    record = GameRecord(player_0, player_1, seed, None if winner < 0 else winner, moves, timings)
+    return record, offset + size
+
+
+class GameRecordWriter:
+    """
+    Append games to a record file, creating it if needed
+    """
+    def __init__(self, path):
+        """
+        Parameters:
+            path: record file
+        """
+        self.path = path
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not new:
+            with open(path, "rb") as f:
+                _check_header(f.read(FILE_HEADER.size), path)
+        self._file = open(path, "ab")
+        if new:
+            # Flushed now so that a reader can map the file before the first game
+            self._file.write(FILE_HEADER.pack(MAGIC, VERSION))
+            self._file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, player_0, player_1, seed, winner, moves, timings=None):
+        """
+        Append one game (see encode_record) and flush it to the file
+        """
+        self._file.write(encode_record(player_0, player_1, seed, winner, moves, timings))
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def _check_header(data, path):
+    if len(data) < FILE_HEADER.size or FILE_HEADER.unpack_from(data, 0) != (MAGIC, VERSION):
+        raise ValueError(f"{path} is not a game record file (version {VERSION})")
+
+
+class GameRecordReader:
+    """
+    Iterate over the games of a record file mapped in memory
+
+    Only the game being decoded is copied out of the map, so files of
+    millions of games are read without loading them.
+    """
+    def __init__(self, path):
+        """
+        Parameters:
+            path: file written by GameRecordWriter
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = None
+        if os.fstat(self._file.fileno()).st_size == 0:
+            # Created but its header not written yet: no games
+            return
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            _check_header(self._map[:FILE_HEADER.size], path)
+        except ValueError:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __iter__(self):
+        if self._map is None:
+            return
+        offset = FILE_HEADER.size
+        end = len(self._map)
+        while offset + RECORD_HEADER.size <= end:
+            size = RECORD_HEADER.unpack_from(self._map, offset)[0]
+            if offset + size > end:
+                # Game being written when the file was mapped
+                break
+            record, offset = decode_record(self._map, offset)
+            yield record
+
+    def close(self):
+        """
+        Unmap and close the file
+        """
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
@@ -0,0 +1,236 @@
+"""
+Round-robin league between registered agents
+
+Agents are registered under a name with a factory called as
+factory(env, player_name=...) (an agent class, or a functools.partial of
+one for a configuration). Every pair plays `games_per_pair` seeded games
+with alternating colors over a process pool. The results are appended to
+a JSON-lines file as they arrive, so a league reloaded from it only plays
+the pairs of the agents added since, and the ratings are updated game by
+game. The games themselves can also be kept in a game record file (see
+game_records).
+"""
+
+import json
+import math
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import combinations
+from game_records import GameRecordWriter
+from parallel_tournament import game_seed, play_game, record_game
+
+INITIAL_ELO = 1500
+
+
+def _pair_seed(seed, a, b):
+    """
+    Seed of the games between agents a and b (a < b), independent of the other agents
+    """
+    return zlib.crc32(f"{a}|{b}".encode()) ^ seed
+
+
+class League:
+    """
+    Round-robin league with incremental Elo and Bradley-Terry ratings
+
+    The Elo ratings are updated after every game, in the order the games
+    finish. The Bradley-Terry ratings are fitted on all the results and do
+    not depend on that order; each fit starts from the previous one, so it
+    only takes a few iterations after new games.
+    """
+    def __init__(self, results_path=None, games_per_pair=10, workers=1, seed=0, k_factor=16, record_path=None):
+        """
+        Parameters:
+            results_path: JSON-lines file of the played games, loaded if it exists (None to keep nothing)
+            games_per_pair: number of games of every pair of agents
+            workers: number of processes
+            seed: seed of the league
+            k_factor: Elo K-factor
+            record_path: game record file the new games are appended to, with their timings (None to keep none)
+        """
+        self.results_path = results_path
+        self.games_per_pair = games_per_pair
+        self.workers = workers
+        self.seed = seed
+        self.k_factor = k_factor
+        self.record_path = record_path
+        self.factories = {}
+        self.elo = {}
+        # scores[a][b]: points of a against b (1 per win, 0.5 per draw), games[a][b]: games played
+        self.scores = {}
+        self.games = {}
+        self._played = set()
+        self._strengths = {}
+        if results_path is not None and os.path.exists(results_path):
+            with open(results_path) as f:
+                for line in f:
+                    if line.strip():
+                        self._record(json.loads(line))
+
+    def register(self, name, factory):
+        """
+        Add an agent to the league
+
+        Parameters:
+            name: unique name of the agent, the key of its results
+            factory: called as factory(env, player_name=...), picklable when workers > 1
+        """
+        if name in self.factories:
+            raise ValueError(f"agent {name} is already registered")
+        self.factories[name] = factory
+        self._add_player(name)
+
+    def _add_player(self, name):
+        self.elo.setdefault(name, INITIAL_ELO)
+        self.scores.setdefault(name, {})
+        self.games.setdefault(name, {})
+
+    def pending_games(self):
+        """
+        Games between registered agents that are not in the results yet
+
+        Returns:
+            list: (agent a, agent b, game number, seed, swap) with a < b
+        """
+        pending = []
+        for a, b in combinations(sorted(self.factories), 2):
+            pair_seed = _pair_seed(self.seed, a, b)
+            for game in range(self.games_per_pair):
+                if (a, b, game) not in self._played:
+                    pending.append((a, b, game, game_seed(pair_seed, game), game % 2 == 1))
+        return pending
+
+    def run(self, callback=None):
+        """
+        Play all the pending games
+
+        Parameters:
+            callback: called with every game record as it arrives
+
+        Returns:
+            int: number of games played
+        """
+        pending = self.pending_games()
+        if self.workers <= 1:
+            results = (self._play(*game) for game in pending)
+            return self._collect(results, callback)
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(play_game, [self.factories[a], self.factories[b]], game, seed, swap, self._timed)
+                       for a, b, game, seed, swap in pending]
+            pairs = {future: game[:2] for future, game in zip(futures, pending)}
+            results = (pairs[future] + (future.result(),) for future in as_completed(futures))
+            return self._collect(results, callback)
+
+    def _play(self, a, b, game, seed, swap):
+        return a, b, play_game([self.factories[a], self.factories[b]], game, seed, swap, self._timed)
+
+    @property
+    def _timed(self):
+        return self.record_path is not None
+
+    def _collect(self, results, callback):
+        """
+        Record, save and report the games of `results` ((a, b, play_game result) tuples)
+        """
+        count = 0
+        f = open(self.results_path, "a") if self.results_path is not None else None
+        writer = GameRecordWriter(self.record_path) if self.record_path is not None else None
+        try:
+            for a, b, result in results:
+                winner = None if result["winner"] is None else (a, b)[result["winner"]]
+                record = {"a": a, "b": b, "game": result["game"], "seed": result["seed"],
+                          "first": (a, b)[result["first"]], "winner": winner, "moves": result["moves"]}
+                self._record(record)
+                if f is not None:
+                    f.write(json.dumps(record) + "\n")
+                    f.flush()
+                if writer is not None:
+                    record_game(writer, (a, b), result)
+                if callback is not None:
+                    callback(record)
+                count += 1
+        finally:
+            if f is not None:
+                f.close()
+            if writer is not None:
+                writer.close()
+        return count
+
+    def _record(self, record):
+        """
+        Add one game to the counters and update the Elo ratings
+        """
+        a, b = record["a"], record["b"]
+        self._add_player(a)
+        self._add_player(b)
+        self._played.add((a, b, record["game"]))
+        if record["winner"] is None:
+            score = 0.5
+        else:
+            score = 1.0 if record["winner"] == a else 0.0
+        self.scores[a][b] = self.scores[a].get(b, 0) + score
+        self.scores[b][a] = self.scores[b].get(a, 0) + 1 - score
+        self.games[a][b] = self.games[a].get(b, 0) + 1
+        self.games[b][a] = self.games[b].get(a, 0) + 1
+
+        expected = 1 / (1 + 10 ** ((self.elo[b] - self.elo[a]) / 400))
+        delta = self.k_factor * (score - expected)
+        self.elo[a] += delta
+        self.elo[b] -= delta
+
+    def bradley_terry(self, iterations=100, tolerance=1e-6):
+        """
+        Fit the Bradley-Terry model on all the results with minorization-maximization
+
+        Every pair that played gets one extra draw, so that agents without
+        a win or a loss still get a finite rating.
+
+        Parameters:
+            iterations: maximum number of iterations
+            tolerance: stop when no strength changes by more than this ratio
+
+        Returns:
+            dict: rating of every agent on the Elo scale, with a mean of INITIAL_ELO
+        """
+        players = sorted(self.games)
+        strengths = {p: self._strengths.get(p, 1.0) for p in players}
+        for _ in range(iterations):
+            change = 0.0
+            updated = {}
+            for p in players:
+                opponents = self.games[p]
+                if not opponents:
+                    updated[p] = strengths[p]
+                    continue
+                points = sum(self.scores[p][q] + 0.5 for q in opponents)
+                denominator = sum((opponents[q] + 1) / (strengths[p] + strengths[q]) for q in opponents)
+                updated[p] = points / denominator
+            # Strengths are only defined up to a factor: keep their geometric mean at 1
+            scale = math.exp(sum(math.log(s) for s in updated.values()) / len(updated)) if updated else 1.0
+            for p in players:
+                new = updated[p] / scale
+                change = max(change, abs(new / strengths[p] - 1))
+                strengths[p] = new
+            if change < tolerance:
+                break
+        self._strengths = strengths
+        return {p: INITIAL_ELO + 400 * math.log10(s) for p, s in strengths.items()}
+
+    def standings(self):
+        """
+        Table of the league, best Bradley-Terry rating first
+
+        Returns:
+            list: dicts with name, games, score, elo and bt
+        """
+        ratings = self.bradley_terry()
+        table = [{
+            "name": p,
+            "games": sum(self.games[p].values()),
+            "score": sum(self.scores[p].values()),
+            "elo": self.elo[p],
+            "bt": ratings[p],
+        } for p in self.games]
+        return sorted(table, key=lambda row: row["bt"], reverse=True)
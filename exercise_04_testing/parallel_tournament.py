@@ -0,0 +1,207 @@
+"""
+Tournament runner spreading the games over a process pool
+
+Every game gets a seed derived from the tournament seed and the game
+number only, so the results are the same whatever the number of workers.
+"""
+
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from pettingzoo.classic import connect_four_v3
+from game_records import GameRecordWriter
+
+
+def game_seed(seed, game):
+    """
+    Seed of one game of a tournament
+
+    Parameters:
+        seed: seed of the tournament
+        game: number of the game
+
+    Returns:
+        int: 32-bit seed
+    """
+    return int(np.random.SeedSequence([seed, game]).generate_state(1)[0])
+
+
+def agent_id(factory):
+    """
+    Id of an agent in the game records: the class name, also for a functools.partial of a class
+    """
+    return getattr(factory, "__name__", None) or getattr(getattr(factory, "func", None), "__name__", repr(factory))
+
+
+def play_game(agent_classes, game, seed, swap=False, timed=False):
+    """
+    Play one seeded game in a fresh connect_four_v3 environment
+
+    Parameters:
+        agent_classes: [AgentClassA, AgentClassB]
+        game: number of the game (reported back)
+        seed: seed of the environment, the action spaces and the random modules
+        swap: if True, agent B plays first (player_0)
+        timed: if True, also return the time taken by every move
+
+    Returns:
+        dict: game, seed, first (index of the agent playing player_0),
+              winner (index of the winning agent, None for a draw), moves (number of moves),
+              history (columns played) and with timed, timings (seconds per move)
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+    env = connect_four_v3.env(render_mode=None)
+    env.reset(seed=seed)
+    for i, name in enumerate(env.possible_agents):
+        env.action_space(name).seed(seed + i)
+
+    first = 1 if swap else 0
+    Agent0, Agent1 = agent_classes[first], agent_classes[1 - first]
+    agents = {
+        "player_0": Agent0(env, player_name="player_0"),
+        "player_1": Agent1(env, player_name="player_1"),
+    }
+
+    total_rewards = {"player_0": 0, "player_1": 0}
+    history = []
+    timings = []
+    for agent_name in env.agent_iter():
+        obs, reward, termination, truncation, info = env.last()
+        total_rewards[agent_name] += reward
+
+        if termination or truncation:
+            env.step(None)
+            continue
+
+        start = time.perf_counter()
+        action = agents[agent_name].choose_action(obs["observation"], reward, termination, truncation, info,
+                                                  obs["action_mask"])
+        timings.append(time.perf_counter() - start)
+        env.step(action)
+        history.append(int(action))
+    env.close()
+
+    if total_rewards["player_0"] == 1:
+        winner = first
+    elif total_rewards["player_1"] == 1:
+        winner = 1 - first
+    else:
+        winner = None
+    result = {"game": game, "seed": seed, "first": first, "winner": winner, "moves": len(history),
+              "history": history}
+    if timed:
+        result["timings"] = timings
+    return result
+
+
+def record_game(writer, names, game):
+    """
+    Append a play_game result to a game record file
+
+    Parameters:
+        writer: game_records.GameRecordWriter
+        names: ids of agent A and agent B
+        game: play_game result, timings are written if present
+    """
+    first = game["first"]
+    winner = None if game["winner"] is None else int(game["winner"] != first)
+    writer.write(names[first], names[1 - first], game["seed"], winner, game["history"], game.get("timings"))
+
+
+def iter_tournament(agent_classes, num_games, workers=1, seed=0, alternate=True, timed=False):
+    """
+    Play a tournament and yield the result of every game as soon as it is over
+
+    Parameters:
+        agent_classes: [AgentClassA, AgentClassB], picklable when workers > 1
+        num_games: number of games
+        workers: number of processes (1 plays in this process)
+        seed: seed of the tournament
+        alternate: if True, the agents swap colors every game (A starts the even games)
+        timed: if True, the results include the time of every move
+
+    Yields:
+        dict: result of play_game, in the order the games finish
+    """
+    jobs = [(agent_classes, game, game_seed(seed, game), alternate and game % 2 == 1, timed)
+            for game in range(num_games)]
+    if workers <= 1:
+        for job in jobs:
+            yield play_game(*job)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(play_game, *job) for job in jobs]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def merge_results(games, num_games):
+    """
+    Count game results in the format of run_tournament
+
+    As in run_tournament, player_0_wins and player_1_wins count the wins
+    of the side that moved first and second. agent_a_wins and agent_b_wins
+    count the wins of the first and second agent classes whatever color
+    they had.
+
+    Parameters:
+        games: iterable of play_game results
+        num_games: number of games of the tournament
+
+    Returns:
+        dict: player_0_wins, player_1_wins, draws, games, agent_a_wins and agent_b_wins
+    """
+    results = {
+        "player_0_wins": 0,
+        "player_1_wins": 0,
+        "draws": 0,
+        "games": num_games,
+        "agent_a_wins": 0,
+        "agent_b_wins": 0,
+    }
+    for game in games:
+        if game["winner"] is None:
+            results["draws"] += 1
+            continue
+        results["agent_a_wins" if game["winner"] == 0 else "agent_b_wins"] += 1
+        results["player_0_wins" if game["winner"] == game["first"] else "player_1_wins"] += 1
+    return results
+
+
+def run_tournament_parallel(agent_classes, num_games, workers=1, seed=0, alternate=True, callback=None,
+                            record_path=None):
+    """
+    Parallel version of run_tournament
+
+    Parameters:
+        agent_classes: [AgentClassA, AgentClassB], picklable when workers > 1
+        num_games: number of games
+        workers: number of processes
+        seed: seed of the tournament, the results only depend on it and not on workers
+        alternate: if True, the agents swap colors every game
+        callback: called with every play_game result as it arrives
+        record_path: game record file the games are appended to, with their timings (None to keep none)
+
+    Returns:
+        dict: see merge_results
+    """
+    names = [agent_id(factory) for factory in agent_classes]
+    writer = GameRecordWriter(record_path) if record_path is not None else None
+
+    def stream():
+        for game in iter_tournament(agent_classes, num_games, workers, seed, alternate, timed=writer is not None):
+            if writer is not None:
+                record_game(writer, names, game)
+            if callback is not None:
+                callback(game)
+            yield game
+
+    try:
+        return merge_results(stream(), num_games)
+    finally:
+        if writer is not None:
+            writer.close()
+
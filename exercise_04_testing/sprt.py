@@ -0,0 +1,195 @@
+"""
+Agent-vs-agent match stopped by a sequential probability ratio test (SPRT)
+
+The match tests H0: elo difference = elo0 against H1: elo difference = elo1
+(first agent minus second agent) on the wins, draws and losses, with the
+generalized SPRT used by engine-testing frameworks: the log-likelihood
+ratio is computed from the mean and variance of the game scores.
+"""
+
+import math
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from game_records import GameRecordWriter
+from parallel_tournament import agent_id, game_seed, play_game, record_game
+
+
+def elo_to_score(elo):
+    """
+    Expected score (0 to 1) for an elo difference
+    """
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def score_to_elo(score):
+    """
+    Elo difference for an expected score, infinite at 0 and 1
+    """
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return -400 * math.log10(1 / score - 1)
+
+
+def sprt_bounds(alpha, beta):
+    """
+    Bounds of the log-likelihood ratio
+
+    Parameters:
+        alpha: probability to accept H1 when H0 is true
+        beta: probability to accept H0 when H1 is true
+
+    Returns:
+        tuple: (lower bound, accept H0 below; upper bound, accept H1 above)
+    """
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def llr(wins, draws, losses, elo0, elo1):
+    """
+    Log-likelihood ratio of H1 against H0
+
+    Parameters:
+        wins, draws, losses: results of the first agent
+        elo0: elo difference of H0
+        elo1: elo difference of H1
+
+    Returns:
+        float: log-likelihood ratio, 0 before the first game
+    """
+    games = wins + draws + losses
+    if games == 0:
+        return 0.0
+    mean = (wins + 0.5 * draws) / games
+    # The variance counts one more win and one more loss, so that a few
+    # identical results do not give a zero variance and an instant verdict
+    prior_games = games + 2
+    prior_mean = (wins + 1 + 0.5 * draws) / prior_games
+    variance = (wins + 1 + 0.25 * draws) / prior_games - prior_mean ** 2
+    score0, score1 = elo_to_score(elo0), elo_to_score(elo1)
+    return 0.5 * games * (score1 - score0) * (2 * mean - score0 - score1) / variance
+
+
+def elo_interval(wins, draws, losses, z=1.96):
+    """
+    Elo difference and its confidence interval
+
+    Parameters:
+        wins, draws, losses: results of the first agent
+        z: quantile of the normal distribution (1.96 for 95%)
+
+    Returns:
+        tuple: (elo, lower bound, upper bound)
+    """
+    games = wins + draws + losses
+    if games == 0:
+        return 0.0, -math.inf, math.inf
+    mean = (wins + 0.5 * draws) / games
+    variance = (wins + 0.25 * draws) / games - mean ** 2
+    margin = z * math.sqrt(max(variance, 0) / games)
+    return score_to_elo(mean), score_to_elo(mean - margin), score_to_elo(mean + margin)
+
+
+def _play_games(agent_classes, max_games, workers, seed, timed=False):
+    """
+    Yield the play_game results in the order of the games, playing `workers` games at a time
+    """
+    jobs = ((agent_classes, game, game_seed(seed, game), game % 2 == 1, timed) for game in range(max_games))
+    if workers <= 1:
+        for job in jobs:
+            yield play_game(*job)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        running = set()
+        finished = {}
+        next_game = 0
+        try:
+            while True:
+                while len(running) < workers:
+                    job = next(jobs, None)
+                    if job is None:
+                        break
+                    running.add(pool.submit(play_game, *job))
+                if not running:
+                    return
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    finished[result["game"]] = result
+                while next_game in finished:
+                    yield finished.pop(next_game)
+                    next_game += 1
+        finally:
+            for future in running:
+                future.cancel()
+
+
+def sprt_match(agent_classes, elo0=0, elo1=10, alpha=0.05, beta=0.05, max_games=20000, workers=1, seed=0,
+               record_path=None):
+    """
+    Play games with alternating colors until the SPRT accepts H0 or H1
+
+    The games are seeded as in parallel_tournament and the test runs on
+    them in game order, so the verdict and the number of games do not
+    depend on `workers` (a few extra games may be played but are ignored).
+
+    Parameters:
+        agent_classes: [AgentClassA, AgentClassB], picklable when workers > 1
+        elo0: elo difference of A over B under H0
+        elo1: elo difference of A over B under H1
+        alpha: probability to accept H1 when H0 is true
+        beta: probability to accept H0 when H1 is true
+        max_games: number of games after which the match stops without a verdict
+        workers: number of processes
+        seed: seed of the match
+        record_path: game record file the games used are appended to, with their timings (None to keep none)
+
+    Returns:
+        dict: the counters of parallel_tournament.merge_results over the games used,
+              verdict ("H0", "H1" or None), llr, bounds, elo and elo_interval (95%)
+    """
+    lower, upper = sprt_bounds(alpha, beta)
+    wins = draws = losses = 0
+    first_wins = 0
+    verdict = None
+    value = 0.0
+    names = [agent_id(factory) for factory in agent_classes]
+    writer = GameRecordWriter(record_path) if record_path is not None else None
+    games = _play_games(agent_classes, max_games, workers, seed, timed=writer is not None)
+    for game in games:
+        if writer is not None:
+            record_game(writer, names, game)
+        if game["winner"] is None:
+            draws += 1
+        elif game["winner"] == 0:
+            wins += 1
+        else:
+            losses += 1
+        if game["winner"] is not None and game["winner"] == game["first"]:
+            first_wins += 1
+        value = llr(wins, draws, losses, elo0, elo1)
+        if value >= upper:
+            verdict = "H1"
+            break
+        if value <= lower:
+            verdict = "H0"
+            break
+    games.close()
+    if writer is not None:
+        writer.close()
+
+    elo, elo_low, elo_high = elo_interval(wins, draws, losses)
+    return {
+        "player_0_wins": first_wins,
+        "player_1_wins": wins + losses - first_wins,
+        "draws": draws,
+        "games": wins + draws + losses,
+        "agent_a_wins": wins,
+        "agent_b_wins": losses,
+        "verdict": verdict,
+        "llr": value,
+        "bounds": (lower, upper),
+        "elo": elo,
+        "elo_interval": (elo_low, elo_high),
+    }
@@ -0,0 +1,41 @@
+"""
+Minimal agents for the tests of the tournament tools
+
+They are defined at module level so that they can be pickled and sent to
+worker processes.
+"""
+
+import random
+import numpy as np
+
+
+class SeededRandomAgent:
+    """
+    Plays a random legal column drawn from the random module
+    """
+    def __init__(self, env, player_name=None):
+        self.env = env
+        self.player_name = player_name
+
+    def choose_action(self, observation, reward, terminated, truncated, info, action_mask):
+        return random.choice(np.flatnonzero(action_mask).tolist())
+
+
+class SpaceSampleAgent(SeededRandomAgent):
+    """
+    Samples the action space of the environment, as RandomAgent
+    """
+    def __init__(self, env, player_name=None):
+        super().__init__(env, player_name)
+        self.action_space = env.action_space(env.agents[0])
+
+    def choose_action(self, observation, reward, terminated, truncated, info, action_mask):
+        return self.action_space.sample(action_mask)
+
+
+class FirstLegalAgent(SeededRandomAgent):
+    """
+    Plays the leftmost column that is not full
+    """
+    def choose_action(self, observation, reward, terminated, truncated, info, action_mask):
+        return int(np.flatnonzero(action_mask)[0])
@@ -0,0 +1,37 @@
+import pytest
+from fast_game import HeadlessConnectFour, benchmark_loops, play_headless
+from stub_agents import SeededRandomAgent, SpaceSampleAgent
+
+
+def test_verify_against_pettingzoo():
+    '''
+    Test that random games agree with connect_four_v3 move by move
+    '''
+    winners = set()
+    for seed in range(40):
+        result = play_headless([SeededRandomAgent, SpaceSampleAgent], seed, verify=True)
+        winners.add(result["winner"])
+    assert {0, 1} <= winners
+
+
+def test_draw_and_illegal_move():
+    '''
+    Test a full board without four in a row and the refusal of a full column
+    '''
+    game = HeadlessConnectFour()
+    # Columns filled in pairs 0-1, 2-3, 4-5 then 6: no line of four
+    order = [0, 1] * 3 + [1, 0] * 3 + [2, 3] * 3 + [3, 2] * 3 + [4, 5] * 3 + [5, 4] * 3 + [6] * 6
+    for col in order[:-1]:
+        assert not game.step(col)
+    assert game.step(order[-1])
+    assert game.winner is None and game.rewards() == {"player_0": 0, "player_1": 0}
+    with pytest.raises(ValueError):
+        game.step(0)
+
+
+def test_benchmark_loops():
+    '''
+    Test that the benchmark reports both loops
+    '''
+    timings = benchmark_loops([SeededRandomAgent, SeededRandomAgent], num_games=5)
+    assert timings["headless"] > 0 and timings["pettingzoo"] > 0
@@ -0,0 +1,98 @@
+import random
+import pytest
+from fast_game import HeadlessConnectFour
+from game_records import FILE_HEADER, GameRecordReader, GameRecordWriter, encode_record, pack_moves, unpack_moves
+from league import League
+from parallel_tournament import run_tournament_parallel
+from stub_agents import FirstLegalAgent, SeededRandomAgent
+
+
+def test_pack_moves():
+    '''
+    Test that moves take 3 bits each and are unpacked unchanged
+    '''
+    moves = [random.Random(1).randrange(7) for _ in range(42)]
+    packed = pack_moves(moves)
+    assert len(packed) == 16
+    assert unpack_moves(packed, 42) == tuple(moves)
+    assert pack_moves([]) == b""
+    with pytest.raises(ValueError):
+        pack_moves([7])
+
+
+def test_write_and_read(tmp_path):
+    '''
+    Test a round trip, appending to an existing file and ignoring a game cut in the middle
+    '''
+    path = tmp_path / "games.c4gr"
+    with GameRecordWriter(path) as writer:
+        writer.write("MinimaxAgent", "SmartAgent", 12345, 0, [3, 3, 4, 4, 5, 5, 6], [0.5] * 7)
+    with GameRecordWriter(path) as writer:
+        writer.write("RandomAgent", "MinimaxAgent", 7, None, [0, 1, 2])
+    with open(path, "ab") as f:
+        f.write(encode_record("a", "b", 1, 1, [0, 0])[:-1])
+
+    with GameRecordReader(path) as reader:
+        games = list(reader)
+    assert len(games) == 2
+    assert games[0] == ("MinimaxAgent", "SmartAgent", 12345, 0, (3, 3, 4, 4, 5, 5, 6), (0.5,) * 7)
+    assert games[1] == ("RandomAgent", "MinimaxAgent", 7, None, (0, 1, 2), None)
+
+    bad = tmp_path / "bad"
+    bad.write_bytes(b"XXXX" + bytes(FILE_HEADER.size))
+    with pytest.raises(ValueError):
+        GameRecordReader(bad)
+    with pytest.raises(ValueError):
+        GameRecordWriter(bad)
+
+
+def test_read_while_writing(tmp_path):
+    '''
+    Test that a reader opened on a new or empty file finds no games, then the games written since
+    '''
+    empty = tmp_path / "empty"
+    empty.touch()
+    with GameRecordReader(empty) as reader:
+        assert list(reader) == []
+
+    path = tmp_path / "games.c4gr"
+    with GameRecordWriter(path) as writer:
+        with GameRecordReader(path) as reader:
+            assert list(reader) == []
+        writer.write("a", "b", 1, 0, [3, 3, 3])
+        with GameRecordReader(path) as reader:
+            assert [game.moves for game in reader] == [(3, 3, 3)]
+
+
+def _replay(record):
+    '''
+    Winner (0, 1 or None) of a recorded game replayed move by move
+    '''
+    game = HeadlessConnectFour()
+    for col in record.moves:
+        game.step(col)
+    assert game.done
+    return game.winner
+
+
+def test_tournament_and_league_records(tmp_path):
+    '''
+    Test that the tournament runners stream replayable games with their timings
+    '''
+    path = tmp_path / "games.c4gr"
+    results = run_tournament_parallel([FirstLegalAgent, SeededRandomAgent], 6, seed=3, record_path=path)
+    league = League(games_per_pair=2, record_path=path)
+    league.register("first", FirstLegalAgent)
+    league.register("random", SeededRandomAgent)
+    league.run()
+
+    with GameRecordReader(path) as reader:
+        games = list(reader)
+    assert len(games) == 8
+    for record in games:
+        assert record.winner == _replay(record)
+        assert len(record.timings) == len(record.moves)
+    wins = sum(1 for record in games[:6] if record.winner is not None
+               and (record.player_0, record.player_1)[record.winner] == "FirstLegalAgent")
+    assert wins == results["agent_a_wins"]
+    assert {games[6].player_0, games[6].player_1} == {"first", "random"}
@@ -0,0 +1,59 @@
+import json
+import numpy as np
+from league import INITIAL_ELO, League
+from stub_agents import FirstLegalAgent, SeededRandomAgent
+
+
+class CenterAgent(FirstLegalAgent):
+    '''
+    Plays the legal column closest to the center
+    '''
+    def choose_action(self, observation, reward, terminated, truncated, info, action_mask):
+        return min(np.flatnonzero(action_mask), key=lambda col: abs(col - 3))
+
+
+def test_round_robin_and_ratings():
+    '''
+    Test that every pair plays and that the ratings rank a stronger agent first
+    '''
+    league = League(games_per_pair=6)
+    league.register("random", SeededRandomAgent)
+    league.register("first", FirstLegalAgent)
+    league.register("center", CenterAgent)
+    assert len(league.pending_games()) == 18
+    records = []
+    assert league.run(callback=records.append) == 18
+    assert league.pending_games() == []
+    assert all(sum(league.games[p].values()) == 12 for p in league.games)
+    ratings = league.bradley_terry()
+    assert abs(sum(ratings.values()) / 3 - INITIAL_ELO) < 1e-6
+    assert league.standings()[0]["score"] == max(row["score"] for row in league.standings())
+    assert abs(sum(league.elo.values()) - 3 * INITIAL_ELO) < 1e-6
+
+
+def test_add_agent_without_replay(tmp_path):
+    '''
+    Test that a reloaded league only plays the games of a new agent, with the same results as a parallel run
+    '''
+    path = tmp_path / "league.jsonl"
+    league = League(path, games_per_pair=4)
+    league.register("random", SeededRandomAgent)
+    league.register("first", FirstLegalAgent)
+    assert league.run() == 4
+
+    reloaded = League(path, games_per_pair=4, workers=2)
+    reloaded.register("random", SeededRandomAgent)
+    reloaded.register("first", FirstLegalAgent)
+    assert reloaded.pending_games() == []
+    reloaded.register("center", CenterAgent)
+    assert reloaded.run() == 8
+
+    with open(path) as f:
+        records = [json.loads(line) for line in f]
+    assert len(records) == 12
+
+    fresh = League(games_per_pair=4)
+    for name, factory in [("center", CenterAgent), ("first", FirstLegalAgent), ("random", SeededRandomAgent)]:
+        fresh.register(name, factory)
+    fresh.run()
+    assert fresh.scores == reloaded.scores
@@ -0,0 +1,33 @@
+from parallel_tournament import game_seed, iter_tournament, play_game, run_tournament_parallel
+from stub_agents import SeededRandomAgent, SpaceSampleAgent
+
+
+def test_game_is_reproducible():
+    '''
+    Test that a game only depends on its seed
+    '''
+    agents = [SeededRandomAgent, SpaceSampleAgent]
+    seed = game_seed(7, 3)
+    assert play_game(agents, 3, seed) == play_game(agents, 3, seed)
+    assert play_game(agents, 3, seed, swap=True)["first"] == 1
+
+
+def test_same_results_any_worker_count():
+    '''
+    Test that one and two workers give the same games and the run_tournament counters
+    '''
+    agents = [SeededRandomAgent, SpaceSampleAgent]
+    serial = sorted(iter_tournament(agents, 12, workers=1, seed=5), key=lambda game: game["game"])
+    parallel = sorted(iter_tournament(agents, 12, workers=2, seed=5), key=lambda game: game["game"])
+    assert serial == parallel
+    assert [game["first"] for game in serial] == [0, 1] * 6
+
+    streamed = []
+    results = run_tournament_parallel(agents, 12, workers=2, seed=5, callback=streamed.append)
+    assert len(streamed) == 12
+    assert results["games"] == 12
+    assert results["player_0_wins"] + results["player_1_wins"] + results["draws"] == 12
+    assert results["agent_a_wins"] + results["agent_b_wins"] + results["draws"] == 12
+    assert results["agent_a_wins"] == sum(game["winner"] == 0 for game in serial)
+    # Seats as in run_tournament: player_0 is the side that moved first
+    assert results["player_0_wins"] == sum(game["winner"] == game["first"] for game in serial)
@@ -0,0 +1,49 @@
+import numpy as np
+from sprt import elo_interval, llr, sprt_bounds, sprt_match
+from stub_agents import SeededRandomAgent
+
+
+class WinningAgent(SeededRandomAgent):
+    '''
+    Completes its own three in a column, else plays randomly
+    '''
+    def choose_action(self, observation, reward, terminated, truncated, info, action_mask):
+        for col in np.flatnonzero(action_mask):
+            filled = np.flatnonzero(observation[:, col, 0] + observation[:, col, 1])
+            top = filled[0] if len(filled) else 6
+            if top <= 3 and observation[top:top + 3, col, 0].all():
+                return int(col)
+        return super().choose_action(observation, reward, terminated, truncated, info, action_mask)
+
+
+def test_llr_and_interval():
+    '''
+    Test the sign of the log-likelihood ratio and the confidence interval
+    '''
+    lower, upper = sprt_bounds(0.05, 0.05)
+    assert lower < 0 < upper
+    assert llr(60, 0, 40, 0, 50) > 0
+    assert llr(40, 0, 60, 0, 50) < 0
+    elo, low, high = elo_interval(60, 10, 30)
+    assert low < elo < high and elo > 0
+
+
+def test_stronger_agent_stops_early():
+    '''
+    Test that a clearly stronger agent is accepted well before max_games, whatever the worker count
+    '''
+    result = sprt_match([WinningAgent, SeededRandomAgent], elo0=0, elo1=50, max_games=2000)
+    assert result["verdict"] == "H1"
+    assert result["games"] < 2000
+    assert result["player_0_wins"] + result["player_1_wins"] + result["draws"] == result["games"]
+    assert result["agent_a_wins"] > result["agent_b_wins"]
+    assert result["elo_interval"][0] > 0
+    assert sprt_match([WinningAgent, SeededRandomAgent], elo0=0, elo1=50, max_games=2000, workers=2) == result
+
+
+def test_equal_agents_accept_h0():
+    '''
+    Test that equal agents reject a large elo difference
+    '''
+    result = sprt_match([SeededRandomAgent, SeededRandomAgent], elo0=0, elo1=150, max_games=2000)
+    assert result["verdict"] == "H0"
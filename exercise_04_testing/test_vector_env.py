@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from pettingzoo.classic import connect_four_v3
+from vector_env import VectorConnectFour, run_tournament_vectorized
+from stub_agents import FirstLegalAgent
+
+
+def test_matches_pettingzoo():
+    '''
+    Test that random games give the same observations, masks and rewards as connect_four_v3
+    '''
+    num_games = 16
+    rng = np.random.default_rng(0)
+    vec = VectorConnectFour(num_games)
+    observations, masks = vec.reset()
+    envs = []
+    for _ in range(num_games):
+        env = connect_four_v3.env(render_mode=None)
+        env.reset(seed=0)
+        envs.append(env)
+
+    while not vec.done.all():
+        actions = np.zeros(num_games, dtype=np.int64)
+        for i, env in enumerate(envs):
+            if vec.done[i]:
+                continue
+            obs, _, termination, _, _ = env.last()
+            assert not termination
+            assert env.agent_selection == f"player_{vec.current[i]}"
+            assert np.array_equal(obs["observation"], observations[i])
+            assert np.array_equal(obs["action_mask"], masks[i])
+            actions[i] = rng.choice(np.flatnonzero(masks[i]))
+        observations, masks, rewards, done = vec.step(actions)
+        for i, env in enumerate(envs):
+            if env.terminations[env.agent_selection]:
+                continue
+            env.step(int(actions[i]))
+            assert done[i] == env.terminations["player_0"]
+            assert rewards[i, 0] == env.rewards["player_0"]
+            assert rewards[i, 1] == env.rewards["player_1"]
+
+
+def test_illegal_move():
+    '''
+    Test that a full column is refused
+    '''
+    vec = VectorConnectFour(2)
+    vec.reset()
+    for _ in range(6):
+        vec.step([0, 1])
+    with pytest.raises(ValueError):
+        vec.step([0, 1])
+
+
+def test_tournament():
+    '''
+    Test the lockstep tournament: the first player wins by stacking the first column
+    '''
+    results = run_tournament_vectorized([FirstLegalAgent, FirstLegalAgent], 5)
+    assert results == {"player_0_wins": 5, "player_1_wins": 0, "draws": 0, "games": 5}
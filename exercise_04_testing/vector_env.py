@@ -0,0 +1,204 @@
+"""
+Vectorized Connect Four: N games stepped together with NumPy arrays
+
+Observations and action masks have the layout of PettingZoo's
+connect_four_v3: (6, 7, 2) int8 boards seen by the player to move
+(channel 0 = its pieces, channel 1 = the opponent's), row 0 at the top,
+and (7,) int8 masks of the columns that are not full.
+"""
+
+import numpy as np
+from gymnasium import spaces
+
+ROWS = 6
+COLS = 7
+AGENTS = ["player_0", "player_1"]
+
+# Bitboards: the cell (row, col) is bit col * 7 + (5 - row), with one empty bit
+# on top of every column so that shifted lines never wrap into the next column
+COLUMN_BITS = ROWS + 1
+# Bit shifts of the 4 line directions: vertical, horizontal and the two diagonals
+_SHIFTS = (1, COLUMN_BITS, COLUMN_BITS - 1, COLUMN_BITS + 1)
+
+
+def cell_bit(row, col):
+    """
+    Bitboard bit of the cell (row, col), row 0 at the top; also works on integer arrays
+    """
+    return col * COLUMN_BITS + (ROWS - 1 - row)
+
+
+def has_four(bits):
+    """
+    Whether bitboards have four in a row
+
+    Parameters:
+        bits: bitboard as a Python int, or numpy int64 array of bitboards
+
+    Returns:
+        bool, or bool numpy array of the shape of `bits`
+    """
+    found = 0
+    for shift in _SHIFTS:
+        pairs = bits & (bits >> shift)
+        found |= pairs & (pairs >> (2 * shift))
+    return found != 0
+
+
+def perspective(boards, players):
+    """
+    Boards seen by the given players: channel 0 holds the pieces of the player
+
+    Parameters:
+        boards: (..., 6, 7, 2) boards with the pieces of player_0 in channel 0
+        players: player (0 or 1) of every board, or one player for all of them
+
+    Returns:
+        numpy array: new array of the shape of `boards`
+    """
+    players = np.asarray(players).reshape(np.shape(players) + (1, 1, 1))
+    return np.where(players == 0, boards, boards[..., ::-1])
+
+
+class AgentSpaces:
+    """
+    The `agents`, `possible_agents` and `action_space` attributes of a
+    PettingZoo environment, so that agents can be built with the object as
+    their `env`
+    """
+    def __init__(self):
+        self.agents = list(AGENTS)
+        self.possible_agents = list(AGENTS)
+        self._action_spaces = {name: spaces.Discrete(COLS) for name in AGENTS}
+
+    def action_space(self, agent):
+        return self._action_spaces[agent]
+
+    def seed_action_spaces(self, seed):
+        """
+        Seed the action spaces as play_game does (seed + agent index)
+        """
+        for i, name in enumerate(AGENTS):
+            self._action_spaces[name].seed(seed + i)
+
+
+class VectorConnectFour(AgentSpaces):
+    """
+    N independent Connect Four games
+
+    `boards[i, :, :, p]` holds the pieces of player p (0 = player_0) of game i.
+    Finished games stay frozen until they are reset.
+    """
+    def __init__(self, num_envs):
+        """
+        Parameters:
+            num_envs: number of games
+        """
+        super().__init__()
+        self.num_envs = num_envs
+        self.boards = np.zeros((num_envs, ROWS, COLS, 2), dtype=np.int8)
+        # Bitboards of the pieces of every player, for the win check
+        self.bits = np.zeros((num_envs, 2), dtype=np.int64)
+        self.heights = np.zeros((num_envs, COLS), dtype=np.int8)
+        self.current = np.zeros(num_envs, dtype=np.int8)
+        self.done = np.zeros(num_envs, dtype=bool)
+        self.winner = np.full(num_envs, -1, dtype=np.int8)
+
+    def reset(self, indices=None):
+        """
+        Start new games
+
+        Parameters:
+            indices: games to reset (None = all)
+
+        Returns:
+            tuple: (observations (N, 6, 7, 2), action masks (N, 7))
+        """
+        if indices is None:
+            indices = slice(None)
+        self.boards[indices] = 0
+        self.bits[indices] = 0
+        self.heights[indices] = 0
+        self.current[indices] = 0
+        self.done[indices] = False
+        self.winner[indices] = -1
+        return self.observe()
+
+    def observe(self):
+        """
+        Observations of the player to move of every game, and the action masks
+
+        Returns:
+            tuple: (observations (N, 6, 7, 2), action masks (N, 7)) as int8 arrays
+        """
+        observations = perspective(self.boards, self.current)
+        masks = (self.heights < ROWS).astype(np.int8)
+        return observations, masks
+
+    def step(self, actions):
+        """
+        Play one move in every game that is not over
+
+        Parameters:
+            actions: (N,) columns played by the player to move (ignored for finished games)
+
+        Returns:
+            tuple: (observations, action masks, rewards (N, 2) of player_0 and player_1,
+                    done (N,) True for the games that are over)
+
+        Raises:
+            ValueError: if a game that is not over gets a full or invalid column
+        """
+        actions = np.asarray(actions)
+        active = np.nonzero(~self.done)[0]
+        cols = actions[active].astype(np.int64)
+        if np.any((cols < 0) | (cols >= COLS)) or np.any(self.heights[active, cols] >= ROWS):
+            raise ValueError("illegal move in an active game")
+        players = self.current[active].astype(np.int64)
+        rows = ROWS - 1 - self.heights[active, cols].astype(np.int64)
+        self.boards[active, rows, cols, players] = 1
+        self.bits[active, players] |= np.left_shift(1, cell_bit(rows, cols))
+        self.heights[active, cols] += 1
+
+        rewards = np.zeros((self.num_envs, 2), dtype=np.int8)
+        won = has_four(self.bits[active, players])
+        full = self.heights[active].min(axis=1) >= ROWS
+        winners = active[won]
+        rewards[winners, self.current[winners]] = 1
+        rewards[winners, 1 - self.current[winners]] = -1
+        self.winner[winners] = self.current[winners]
+        self.done[active[won | full]] = True
+        self.current[active] = 1 - self.current[active]
+        observations, masks = self.observe()
+        return observations, masks, rewards, self.done.copy()
+
+
+def run_tournament_vectorized(agent_classes, num_games):
+    """
+    run_tournament with all the games played in lockstep in a VectorConnectFour
+
+    Parameters:
+        agent_classes: [AgentClassPlayer0, AgentClassPlayer1]
+        num_games: number of games
+    Return:
+        results: dict with player_0_wins, player_1_wins, draws and games, as run_tournament
+    """
+    Agent0, Agent1 = agent_classes
+    env = VectorConnectFour(num_games)
+    observations, masks = env.reset()
+    players = [[Agent0(env, player_name="player_0"), Agent1(env, player_name="player_1")]
+               for _ in range(num_games)]
+
+    while not env.done.all():
+        actions = np.zeros(num_games, dtype=np.int64)
+        for i in np.nonzero(~env.done)[0]:
+            agent = players[i][env.current[i]]
+            actions[i] = agent.choose_action(observations[i], 0, False, False, {}, masks[i])
+        observations, masks, _, _ = env.step(actions)
+
+    return {
+        "player_0_wins": int(np.sum(env.winner == 0)),
+        "player_1_wins": int(np.sum(env.winner == 1)),
+        "draws": int(np.sum(env.winner == -1)),
+        "games": num_games,
+    }
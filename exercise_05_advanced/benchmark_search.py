@@ -0,0 +1,135 @@
+import time
+from bitboard import Bitboard
+from minimax_agent import MinimaxAgent
+from mcts_agent import MCTSAgent
+from positions import random_observation
+
+def benchmark_search(depth=9, num_positions=8, **agent_options):
+    """
+    Search a fixed set of positions to a fixed depth and sum the statistics
+
+    Parameters:
+        depth: search depth (root move included)
+        num_positions: number of random positions
+        agent_options: options given to MinimaxAgent (algorithm, ...)
+
+    Returns:
+        dict: nodes, time, nodes/sec, root re-searches and nodes needed to finish each depth
+    """
+    nodes = 0
+    elapsed = 0.0
+    root_researches = 0
+    nodes_per_depth = [0] * depth
+    for seed in range(num_positions):
+        agent = MinimaxAgent(None, max_depth=depth, time_limit=1000.0, **agent_options)
+        pos = Bitboard.from_observation(random_observation(8 + seed, seed))
+        start = time.perf_counter()
+        agent._iterative_deepening(pos, pos.valid_moves(), start)
+        info = agent.last_search_info
+        nodes += info["nodes"]
+        elapsed += info["time"]
+        root_researches += info["root_researches"]
+        for d, n in enumerate(info["nodes_per_depth"]):
+            nodes_per_depth[d] += n
+    return {
+        "nodes": nodes,
+        "time": elapsed,
+        "nps": nodes / elapsed,
+        "root_researches": root_researches,
+        "nodes_per_depth": nodes_per_depth,
+    }
+
+
+def benchmark_workers(depth=9, num_positions=8, workers=(1, 2, 4), parallel="lazysmp", **agent_options):
+    """
+    Time the search of a fixed set of positions to a fixed depth with several
+    numbers of worker processes, and compare with one worker
+
+    Parameters:
+        depth: search depth (root move included)
+        num_positions: number of random positions
+        workers: numbers of workers to try (1 = serial search)
+        parallel: "root" or "lazysmp"
+        agent_options: options given to MinimaxAgent
+
+    Returns:
+        dict: {workers: (time, nodes, speedup versus the serial search)}
+    """
+    results = {}
+    for count in workers:
+        agent = MinimaxAgent(None, max_depth=depth, time_limit=1000.0, workers=count,
+                             parallel=parallel, **agent_options)
+        if count > 1:
+            agent._get_pool().submit(int).result()
+        elapsed = 0.0
+        nodes = 0
+        try:
+            for seed in range(num_positions):
+                pos = Bitboard.from_observation(random_observation(8 + seed, seed))
+                agent.transposition.new_search()
+                agent._deadline = None
+                start = time.perf_counter()
+                if count == 1:
+                    agent._iterative_deepening(pos, pos.valid_moves(), start)
+                elif parallel == "lazysmp":
+                    agent._lazy_smp_search(pos, pos.valid_moves(), start)
+                else:
+                    agent._parallel_root_search(pos, pos.valid_moves(), start)
+                elapsed += time.perf_counter() - start
+                nodes += agent.last_search_info["nodes"] + agent.last_search_info.get("helper_nodes", 0)
+        finally:
+            agent.close()
+        results[count] = (elapsed, nodes, results[workers[0]][0] / elapsed if results else 1.0)
+    return results
+
+
+def benchmark_mcts(time_limit=1.0, num_positions=4, workers=(1, 2, 4), parallel="tree", **agent_options):
+    """
+    Measure the playouts per second of MCTSAgent with several numbers of workers
+
+    Parameters:
+        time_limit: search time per position in seconds
+        num_positions: number of random positions
+        workers: numbers of threads ("tree") or processes ("root") to try
+        parallel: "tree" or "root"
+        agent_options: options given to MCTSAgent
+
+    Returns:
+        dict: {workers: (playouts/sec, speedup versus the first number of workers)}
+    """
+    results = {}
+    for count in workers:
+        agent = MCTSAgent(None, time_limit=time_limit, workers=count, parallel=parallel, reuse_tree=False,
+                          seed=0, **agent_options)
+        if count > 1 and parallel == "root":
+            agent._get_pool().submit(int).result()
+        playouts = 0
+        elapsed = 0.0
+        try:
+            for seed in range(num_positions):
+                agent.choose_action(random_observation(8 + seed, seed))
+                playouts += agent.last_search_info["playouts"]
+                elapsed += agent.last_search_info["time"]
+        finally:
+            agent.close()
+        rate = playouts / elapsed
+        results[count] = (rate, rate / results[workers[0]][0] if results else 1.0)
+    return results
+
+
+if __name__ == "__main__":
+    for algorithm in ("alphabeta", "pvs"):
+        for root_driver in ("full", "aspiration", "mtdf"):
+            result = benchmark_search(algorithm=algorithm, root_driver=root_driver)
+            name = f"{algorithm}/{root_driver}"
+            print(f"{name:>20}: {result['nodes']} nodes in {result['time']:.2f} s "
+                  f"({result['nps']:.0f} nodes/s, {result['root_researches']} root re-searches)")
+            print(f"{'':>20}  nodes to depth: {result['nodes_per_depth']}")
+
+    for parallel in ("root", "lazysmp"):
+        for count, (elapsed, nodes, speedup) in benchmark_workers(parallel=parallel).items():
+            print(f"{parallel:>10} x{count}: {elapsed:.2f} s, {nodes} nodes, speedup {speedup:.2f}")
+
+    for parallel in ("tree", "root"):
+        for count, (rate, speedup) in benchmark_mcts(parallel=parallel).items():
+            print(f"MCTS {parallel:>5} x{count}: {rate:.0f} playouts/s, speedup {speedup:.2f}")
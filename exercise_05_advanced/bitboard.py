@@ -0,0 +1,377 @@
+"""
+Bitboard representation of a Connect Four position
+
+Each column uses 7 bits: 6 playable cells (bottom to top) and one empty
+sentinel bit on top, so that shifted masks never wrap from one column
+into the next one. The cell (row, col) of a PettingZoo observation is
+stored at bit `col * 7 + (5 - row)`.
+"""
+
+import random
+import numpy as np
+
+ROWS = 6
+COLS = 7
+COLUMN_BITS = ROWS + 1
+
+BOTTOM_MASK = sum(1 << (col * COLUMN_BITS) for col in range(COLS))
+BOARD_MASK = BOTTOM_MASK * ((1 << ROWS) - 1)
+
+# Shifts of the 4 line directions: vertical, horizontal and both diagonals
+DIRECTIONS = (1, COLUMN_BITS, COLUMN_BITS - 1, COLUMN_BITS + 1)
+
+# Center-first order used to explore the columns
+MOVE_ORDER = (3, 2, 4, 1, 5, 0, 6)
+
+# Zobrist keys: one random 64-bit number per (channel, bit), plus one for
+# the side to move. A fixed seed keeps hashes identical across processes.
+_zobrist_rng = random.Random(0x5EED)
+ZOBRIST = [[_zobrist_rng.getrandbits(64) for _ in range(COLS * COLUMN_BITS)] for _ in range(2)]
+ZOBRIST_SIDE = _zobrist_rng.getrandbits(64)
+
+# Left-right symmetry: bit of the mirror cell (column c <-> column 6 - c),
+# and the Zobrist keys of the mirror image of each (channel, bit)
+MIRROR_BIT = [(COLS - 1 - bit // COLUMN_BITS) * COLUMN_BITS + bit % COLUMN_BITS
+              for bit in range(COLS * COLUMN_BITS)]
+ZOBRIST_MIRROR = [[table[MIRROR_BIT[bit]] for bit in range(COLS * COLUMN_BITS)] for table in ZOBRIST]
+_COLUMN = (1 << COLUMN_BITS) - 1
+
+
+def mirror(bits):
+    """
+    Mirror image of a bitboard (column c goes to column 6 - c)
+    """
+    mirrored = 0
+    for col in range(COLS):
+        mirrored |= ((bits >> (col * COLUMN_BITS)) & _COLUMN) << ((COLS - 1 - col) * COLUMN_BITS)
+    return mirrored
+
+
+def mirror_move(col):
+    """
+    Column of the mirror image of a move (NO_MOVE = -1 stays -1)
+    """
+    return COLS - 1 - col if col >= 0 else col
+
+
+def in_board(bit):
+    """
+    True if `bit` is one of the 42 cells (not a sentinel nor outside the board)
+    """
+    return 0 <= bit < COLS * COLUMN_BITS and (BOARD_MASK >> bit) & 1 == 1
+
+
+# The 69 windows of 4 aligned cells, and for each cell the windows through it
+WINNING_LINES = [
+    sum(1 << (q + k * s) for k in range(4))
+    for s in DIRECTIONS
+    for q in range(COLS * COLUMN_BITS)
+    if all(in_board(q + k * s) for k in range(4))
+]
+LINES_THROUGH = [[line for line in WINNING_LINES if (line >> bit) & 1] for bit in range(COLS * COLUMN_BITS)]
+
+
+def wins_at(pieces, bit):
+    """
+    Check whether the piece on `bit` is part of a four-in-a-row of `pieces`.
+    Only the (at most 13) windows through `bit` are looked at.
+
+    Returns:
+        bool: True if one of these windows is full
+    """
+    for line in LINES_THROUGH[bit]:
+        if pieces & line == line:
+            return True
+    return False
+
+
+def cell_bit(row, col):
+    """
+    Bit index of the cell (row, col) of an observation (row 0 is the top row)
+    """
+    return col * COLUMN_BITS + (ROWS - 1 - row)
+
+
+def has_four(pieces):
+    """
+    Check whether a bitboard contains 4 aligned pieces
+
+    Returns:
+        bool: True if there is a four-in-a-row
+    """
+    for s in DIRECTIONS:
+        m = pieces & (pieces >> s)
+        if m & (m >> (2 * s)):
+            return True
+    return False
+
+
+def winning_cells(pieces, mask):
+    """
+    Empty cells that would complete a four-in-a-row for `pieces`
+
+    Parameters:
+        pieces: bitboard of the player
+        mask: bitboard of all the pieces on the board
+
+    Returns:
+        int: bitboard of the winning cells (playable or not)
+    """
+    # vertical
+    r = (pieces << 1) & (pieces << 2) & (pieces << 3)
+    for s in DIRECTIONS[1:]:
+        p = (pieces << s) & (pieces << (2 * s))
+        r |= p & (pieces << (3 * s))
+        r |= p & (pieces >> s)
+        p = (pieces >> s) & (pieces >> (2 * s))
+        r |= p & (pieces << s)
+        r |= p & (pieces >> (3 * s))
+    return r & (BOARD_MASK ^ mask)
+
+
+def count_two_in_row(pieces):
+    """
+    Number of pairs of adjacent pieces, counted once per direction
+
+    Returns:
+        int: the number of two-in-a-row
+    """
+    count = 0
+    for s in DIRECTIONS:
+        count += (pieces & (pieces >> s)).bit_count()
+    return count
+
+
+def count_three_in_row(pieces, empty):
+    """
+    Number of three aligned pieces with an empty cell at one end at least
+
+    Parameters:
+        pieces: bitboard of the player
+        empty: bitboard of the empty cells
+
+    Returns:
+        int: the number of three-in-a-row
+    """
+    count = 0
+    for s in DIRECTIONS:
+        three = pieces & (pieces >> s) & (pieces >> (2 * s))
+        count += (three & ((empty << s) | (empty >> (3 * s)))).bit_count()
+    return count
+
+
+class Bitboard:
+    """
+    Connect Four position stored as two bitboards plus the column heights
+
+    `pieces[0]` holds the pieces of channel 0 (the agent to move at the root)
+    and `pieces[1]` the pieces of channel 1 (the opponent).
+    `hash` is a 64-bit Zobrist key of the pieces and of the side to move,
+    and `mirror_hash` the key of the mirror image, both updated
+    incrementally by `play` and `undo`. `canonical_key` gives the same key
+    for a position and its mirror image.
+    """
+    __slots__ = ("pieces", "heights", "moves", "hash", "mirror_hash")
+
+    def __init__(self):
+        self.pieces = [0, 0]
+        self.heights = [0] * COLS
+        self.moves = 0
+        self.hash = 0
+        self.mirror_hash = 0
+
+    @classmethod
+    def from_observation(cls, observation):
+        """
+        Build a position from a PettingZoo observation
+
+        Parameters:
+            observation: numpy array (6, 7, 2)
+
+        Returns:
+            Bitboard
+        """
+        pos = cls()
+        for channel in range(2):
+            rows, cols = np.nonzero(observation[:, :, channel])
+            bits = 0
+            for row, col in zip(rows.tolist(), cols.tolist()):
+                bits |= 1 << cell_bit(row, col)
+            pos.pieces[channel] = bits
+        occupied = (observation[:, :, 0] != 0) | (observation[:, :, 1] != 0)
+        pos.heights = occupied.sum(axis=0).astype(int).tolist()
+        pos.moves = sum(pos.heights)
+        pos.hash = pos.compute_hash()
+        pos.mirror_hash = pos.compute_hash(mirrored=True)
+        return pos
+
+    def to_observation(self):
+        """
+        Convert the position back to a PettingZoo observation
+
+        Returns:
+            numpy array (6, 7, 2)
+        """
+        observation = np.zeros((ROWS, COLS, 2), dtype=np.int8)
+        for channel in range(2):
+            bits = self.pieces[channel]
+            while bits:
+                low = bits & -bits
+                index = low.bit_length() - 1
+                col, height = divmod(index, COLUMN_BITS)
+                observation[ROWS - 1 - height, col, channel] = 1
+                bits ^= low
+        return observation
+
+    def copy(self):
+        """
+        Return an independent copy of the position
+        """
+        pos = Bitboard()
+        pos.pieces = self.pieces[:]
+        pos.heights = self.heights[:]
+        pos.moves = self.moves
+        pos.hash = self.hash
+        pos.mirror_hash = self.mirror_hash
+        return pos
+
+    def compute_hash(self, mirrored=False):
+        """
+        Compute the Zobrist key from scratch, with channel 0 to move
+
+        Parameters:
+            mirrored: compute the key of the mirror image instead
+
+        Returns:
+            int: 64-bit key
+        """
+        zobrist = ZOBRIST_MIRROR if mirrored else ZOBRIST
+        key = 0
+        for channel in range(2):
+            bits = self.pieces[channel]
+            while bits:
+                low = bits & -bits
+                key ^= zobrist[channel][low.bit_length() - 1]
+                bits ^= low
+        return key
+
+    def swap_channels(self):
+        """
+        Exchange the pieces of the two channels (e.g. to search with channel 1 to move)
+        """
+        self.pieces.reverse()
+        self.hash = self.compute_hash()
+        self.mirror_hash = self.compute_hash(mirrored=True)
+
+    def canonical_key(self):
+        """
+        Key shared by the position and its mirror image
+
+        Returns:
+            tuple: (key, mirrored) where mirrored is True if the key is the one of
+            the mirror image (moves stored with it must go through mirror_move)
+        """
+        if self.mirror_hash < self.hash:
+            return self.mirror_hash, True
+        return self.hash, False
+
+    def mask(self):
+        """
+        Bitboard of all the pieces on the board
+        """
+        return self.pieces[0] | self.pieces[1]
+
+    def can_play(self, col):
+        """
+        True if column `col` is not full
+        """
+        return self.heights[col] < ROWS
+
+    def valid_moves(self):
+        """
+        Non-full columns in center-first order
+        """
+        heights = self.heights
+        return [c for c in MOVE_ORDER if heights[c] < ROWS]
+
+    def playable_mask(self):
+        """
+        Bitboard of the cells where a piece can be dropped right now
+        """
+        return (self.mask() + BOTTOM_MASK) & BOARD_MASK
+
+    def empty_count(self):
+        """
+        Number of empty cells
+        """
+        return ROWS * COLS - self.moves
+
+    def play(self, col, channel):
+        """
+        Drop a piece of `channel` in column `col`
+
+        Returns:
+            int or None: the observation row of the piece, None if the column is full
+        """
+        height = self.heights[col]
+        if height >= ROWS:
+            return None
+        index = col * COLUMN_BITS + height
+        self.pieces[channel] |= 1 << index
+        self.heights[col] = height + 1
+        self.moves += 1
+        self.hash ^= ZOBRIST[channel][index] ^ ZOBRIST_SIDE
+        self.mirror_hash ^= ZOBRIST_MIRROR[channel][index] ^ ZOBRIST_SIDE
+        return ROWS - 1 - height
+
+    def undo(self, col, channel):
+        """
+        Remove the top piece of column `col`, which must belong to `channel`
+        """
+        height = self.heights[col] - 1
+        index = col * COLUMN_BITS + height
+        self.pieces[channel] &= ~(1 << index)
+        self.heights[col] = height
+        self.moves -= 1
+        self.hash ^= ZOBRIST[channel][index] ^ ZOBRIST_SIDE
+        self.mirror_hash ^= ZOBRIST_MIRROR[channel][index] ^ ZOBRIST_SIDE
+
+    def is_win(self, channel):
+        """
+        True if `channel` has four aligned pieces
+        """
+        return has_four(self.pieces[channel])
+
+    def is_win_at(self, col, channel):
+        """
+        True if the top piece of column `col` (usually the last move) wins for `channel`
+        """
+        return wins_at(self.pieces[channel], col * COLUMN_BITS + self.heights[col] - 1)
+
+    def winning_column(self, channel):
+        """
+        First column (center-first order) where a piece of `channel` would win
+
+        Returns:
+            int or None: the column, None if there is no winning drop
+        """
+        pieces = self.pieces[channel]
+        for col in MOVE_ORDER:
+            height = self.heights[col]
+            if height < ROWS:
+                bit = col * COLUMN_BITS + height
+                if wins_at(pieces | (1 << bit), bit):
+                    return col
+        return None
+
+    def winning_cells(self, channel):
+        """
+        Empty cells that would give a four-in-a-row to `channel`
+        """
+        return winning_cells(self.pieces[channel], self.mask())
+
+    def can_win_next(self, channel):
+        """
+        True if `channel` can win by playing one of the current playable cells
+        """
+        return bool(self.winning_cells(channel) & self.playable_mask())
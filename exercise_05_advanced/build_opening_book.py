@@ -0,0 +1,77 @@
+"""
+Offline builder of the opening book read by opening_book.OpeningBook
+"""
+
+import time
+from bitboard import Bitboard, mirror_move
+from minimax_agent import MinimaxAgent
+from opening_book import HEADER, MAGIC, RECORD, VERSION, position_key
+
+
+def _positions(max_ply):
+    """
+    Positions of the first `max_ply` plies where the game is not over,
+    one per mirror pair
+
+    Returns:
+        dict: {key: (Bitboard, channel to move, mirrored)}
+    """
+    found = {}
+    frontier = [(Bitboard(), 0)]
+    for ply in range(max_ply + 1):
+        next_frontier = []
+        for pos, channel in frontier:
+            key, mirrored = position_key(pos, channel)
+            if key in found:
+                continue
+            found[key] = (pos, channel, mirrored)
+            if ply == max_ply:
+                continue
+            for col in pos.valid_moves():
+                child = pos.copy()
+                child.play(col, channel)
+                if not child.is_win_at(col, channel):
+                    next_frontier.append((child, 1 - channel))
+        frontier = next_frontier
+    return found
+
+
+def build_book(path, max_ply=4, depth=10, verbose=False):
+    """
+    Search every position of the first plies and write the book
+
+    Parameters:
+        path: output file
+        max_ply: positions with up to this number of pieces are stored
+        depth: search depth of MinimaxAgent for each position
+        verbose: print the progress
+
+    Returns:
+        int: number of positions written
+    """
+    agent = MinimaxAgent(None, max_depth=depth, time_limit=float("inf"), solver_empty=None)
+    records = []
+    positions = _positions(max_ply)
+    start = time.perf_counter()
+    for i, (key, (pos, channel, mirrored)) in enumerate(sorted(positions.items())):
+        # The agent searches with channel 0 to move
+        search_pos = pos.copy()
+        if channel == 1:
+            search_pos.swap_channels()
+        agent.transposition.new_search()
+        move = agent._iterative_deepening(search_pos, search_pos.valid_moves(), time.perf_counter())
+        value = int(agent.last_search_info["value"])
+        records.append((key, value, mirror_move(move) if mirrored else move))
+        if verbose and (i + 1) % 100 == 0:
+            print(f"{i + 1}/{len(positions)} positions, {time.perf_counter() - start:.0f} s")
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, max_ply, depth, len(records)))
+        for record in records:
+            f.write(RECORD.pack(*record))
+    return len(records)
+
+
+if __name__ == "__main__":
+    count = build_book("opening_book.bin", max_ply=6, depth=12, verbose=True)
+    print(f"{count} positions written to opening_book.bin")
@@ -0,0 +1,254 @@
+"""
+Exact solver for Connect Four endgames
+"""
+
+import random
+import time
+from bitboard import BOARD_MASK, BOTTOM_MASK, COLS, COLUMN_BITS, MOVE_ORDER, ROWS, mirror_move, winning_cells
+from transposition_table import TranspositionTable, MAX_DEPTH, EXACT, LOWER, UPPER, NO_MOVE
+
+TOTAL_MOVES = ROWS * COLS
+
+COLUMN_MASKS = [((1 << ROWS) - 1) << (col * COLUMN_BITS) for col in range(COLS)]
+
+# Keeps apart the entries of the two channels for the same pieces
+_CHANNEL_KEY = random.Random(0x50_1E).getrandbits(64)
+
+
+class SolverTimeout(Exception):
+    """
+    Raised inside the solver when the deadline is reached
+    """
+
+
+def win_score(move_number):
+    """
+    Score of a win made by the piece number `move_number` (1 to 42), for the side that makes it.
+    Faster wins score more, a loss is the negative of the win.
+    """
+    return TOTAL_MOVES + 1 - move_number
+
+
+def describe(score, moves):
+    """
+    Turn a solver score into a game result
+
+    Parameters:
+        score: score returned by the solver, for the side to move
+        moves: number of pieces on the board of the solved position
+
+    Returns:
+        tuple: ("win", "draw" or "loss", number of plies until the end of the game)
+    """
+    if score > 0:
+        return "win", TOTAL_MOVES + 1 - score - moves
+    if score < 0:
+        return "loss", TOTAL_MOVES + 1 + score - moves
+    return "draw", TOTAL_MOVES - moves
+
+
+class EndgameSolver:
+    """
+    Negamax solver proving the exact result of a position and the distance to it
+
+    The score of a position for the side to move is 0 for a draw,
+    43 - n for a win made by the n-th piece of the game, and the opposite
+    for a loss. The search only plays moves that do not lose at once,
+    orders them by the number of threats they create, and narrows the
+    score with null-window searches. Proven bounds are kept in a
+    transposition table between calls.
+    """
+    def __init__(self, tt_size_mb=16):
+        """
+        Parameters:
+            tt_size_mb: memory budget of the table of proven results
+        """
+        self.transposition = TranspositionTable(tt_size_mb)
+        self.nodes = 0
+        self._deadline = None
+
+    def solve(self, pos, channel, deadline=None):
+        """
+        Exact score of a position
+
+        Parameters:
+            pos: Bitboard position
+            channel: channel to move
+            deadline: time.perf_counter() at which to give up, None for no limit
+
+        Returns:
+            int: score for `channel` (see the class documentation)
+
+        Raises:
+            SolverTimeout: if the deadline is reached
+        """
+        self._deadline = deadline
+        mask = pos.mask()
+        if winning_cells(pos.pieces[channel], mask) & ((mask + BOTTOM_MASK) & BOARD_MASK):
+            return win_score(pos.moves + 1)
+        low = -win_score(pos.moves + 2)
+        high = win_score(pos.moves + 1)
+        while low < high:
+            # Test 0 first (win/draw/loss), then narrow down the distance
+            med = low + (high - low) // 2
+            if med <= 0 and low // 2 < med:
+                med = low // 2
+            elif med >= 0 and high // 2 > med:
+                med = high // 2
+            value = self._negamax(pos, channel, med, med + 1)
+            if value <= med:
+                high = value
+            else:
+                low = value
+        return low
+
+    def best_move(self, pos, channel, deadline=None):
+        """
+        Optimal move: fastest win, else a draw, else the slowest loss
+
+        Parameters:
+            pos: Bitboard position, not finished
+            channel: channel to move
+            deadline: time.perf_counter() at which to give up, None for no limit
+
+        Returns:
+            tuple: (column, score for `channel`)
+
+        Raises:
+            SolverTimeout: if the deadline is reached
+        """
+        score = self.solve(pos, channel, deadline)
+        other = 1 - channel
+        mask = pos.mask()
+        moves = sorted(pos.valid_moves(),
+                       key=lambda col: -self._threats_after(pos.pieces[channel], mask, col, pos.heights))
+        for col in moves:
+            pos.play(col, channel)
+            try:
+                if pos.is_win_at(col, channel):
+                    value = win_score(pos.moves)
+                elif pos.moves == TOTAL_MOVES:
+                    value = 0
+                else:
+                    value = -self.solve(pos, other, deadline)
+            finally:
+                pos.undo(col, channel)
+            if value == score:
+                return col, score
+        # Not reached: one of the moves always reaches the score of the position
+        return moves[0], score
+
+    @staticmethod
+    def _threats_after(pieces, mask, col, heights):
+        """
+        Number of winning cells of `pieces` after a drop in `col`
+        """
+        bit = 1 << (col * COLUMN_BITS + heights[col])
+        return winning_cells(pieces | bit, mask | bit).bit_count()
+
+    def _negamax(self, pos, channel, alpha, beta):
+        """
+        Fail-soft negamax on the score of the side to move
+
+        Parameters:
+            pos: Bitboard position
+            channel: channel to move
+            alpha: lower bound of the window
+            beta: upper bound of the window
+
+        Returns:
+            int: score for `channel`, a bound if outside (alpha, beta)
+        """
+        self.nodes += 1
+        if self._deadline is not None and not self.nodes & 1023 and time.perf_counter() > self._deadline:
+            raise SolverTimeout()
+
+        mine = pos.pieces[channel]
+        mask = mine | pos.pieces[1 - channel]
+        playable = (mask + BOTTOM_MASK) & BOARD_MASK
+        moves = pos.moves
+        if winning_cells(mine, mask) & playable:
+            return win_score(moves + 1)
+        if moves >= TOTAL_MOVES:
+            return 0
+
+        theirs = pos.pieces[1 - channel]
+        their_wins = winning_cells(theirs, mask)
+        forced = their_wins & playable
+        if forced:
+            if forced & (forced - 1):
+                # Two threats: one of them cannot be blocked
+                return -win_score(moves + 2)
+            playable = forced
+        # Never play just below a winning cell of the opponent
+        possible = playable & ~(their_wins >> 1)
+        if not possible:
+            return -win_score(moves + 2)
+        if moves >= TOTAL_MOVES - 2:
+            return 0
+
+        # Neither side can win before their next-but-one move
+        lower = -win_score(moves + 4)
+        upper = win_score(moves + 3)
+        if alpha < lower:
+            alpha = lower
+        if beta > upper:
+            beta = upper
+        if alpha >= beta:
+            return alpha
+
+        # A position and its mirror image share one entry
+        key, mirrored = pos.canonical_key()
+        key ^= _CHANNEL_KEY if channel else 0
+        hash_move = NO_MOVE
+        entry = self.transposition.probe(key)
+        if entry is not None:
+            value, _, flag, hash_move = entry
+            if mirrored:
+                hash_move = mirror_move(hash_move)
+            if flag == EXACT:
+                return value
+            if flag == LOWER:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value
+        alpha_orig = alpha
+
+        ordered = []
+        for col in MOVE_ORDER:
+            bit = possible & COLUMN_MASKS[col]
+            if bit:
+                if col == hash_move:
+                    score = 1 << 10
+                else:
+                    score = winning_cells(mine | bit, mask | bit).bit_count()
+                ordered.append((score, col))
+        ordered.sort(key=lambda item: item[0], reverse=True)
+
+        other = 1 - channel
+        best_value = -TOTAL_MOVES
+        best_move = NO_MOVE
+        for _, col in ordered:
+            pos.play(col, channel)
+            try:
+                value = -self._negamax(pos, other, -beta, -alpha)
+            finally:
+                pos.undo(col, channel)
+            if value > best_value:
+                best_value = value
+                best_move = col
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+
+        if best_value <= alpha_orig:
+            flag = UPPER
+        elif best_value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.transposition.store(key, MAX_DEPTH, best_value, flag, mirror_move(best_move) if mirrored else best_move)
+        return best_value
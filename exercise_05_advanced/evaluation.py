@@ -0,0 +1,155 @@
+"""
+Incremental evaluation of Bitboard positions
+"""
+
+from bitboard import (BOARD_MASK, COLS, COLUMN_BITS, DIRECTIONS, ZOBRIST, ZOBRIST_SIDE,
+                      count_three_in_row, count_two_in_row, in_board, winning_cells)
+
+NUM_BITS = COLS * COLUMN_BITS
+
+# For each cell: the cells adjacent to it in the 4 directions
+NEIGHBORS = [0] * NUM_BITS
+# For each cell: (cells, ends) of the windows of 3 aligned cells containing it,
+# `ends` being the in-board cells just before and after the window
+TRIPLES_THROUGH = [[] for _ in range(NUM_BITS)]
+# For each cell: (cells, other end) of the windows of 3 cells that have it as an end
+TRIPLES_ENDING = [[] for _ in range(NUM_BITS)]
+
+for _s in DIRECTIONS:
+    for _q in range(NUM_BITS):
+        if not in_board(_q):
+            continue
+        for _n in (_q - _s, _q + _s):
+            if in_board(_n):
+                NEIGHBORS[_q] |= 1 << _n
+        _cells = (_q, _q + _s, _q + 2 * _s)
+        if not all(in_board(c) for c in _cells):
+            continue
+        _triple = sum(1 << c for c in _cells)
+        _ends = [e for e in (_q - _s, _q + 3 * _s) if in_board(e)]
+        _ends_mask = sum(1 << e for e in _ends)
+        for c in _cells:
+            TRIPLES_THROUGH[c].append((_triple, _ends_mask))
+        for e in _ends:
+            TRIPLES_ENDING[e].append((_triple, _ends_mask & ~(1 << e)))
+
+
+# Weight of each term for channel 0 (us) and channel 1 (opponent), as in `_evaluate`
+TWO_WEIGHTS = (20, -10)
+THREE_WEIGHTS = (200, -50)
+POSITION_SIGNS = (1, -1)
+
+
+class IncrementalEvaluator:
+    """
+    Evaluation terms of a position, updated at every move instead of
+    being recomputed at every leaf.
+
+    It keeps the weighted sum of the positional weights, two-in-a-row and
+    open three-in-a-row of both channels (`static`), the threat sets
+    (empty cells that would complete four) and the winner, if any. The
+    scores are the same as `MinimaxAgent._evaluate`.
+    """
+    def __init__(self, bit_weights):
+        """
+        Parameters:
+            bit_weights: position weight of every bit of a Bitboard
+        """
+        self.bit_weights = bit_weights
+        self._piece_values = [[sign * w for w in bit_weights] for sign in POSITION_SIGNS]
+        self._key = None
+        self._stack = []
+        self.static = 0
+        self.threats = (0, 0)
+        self.winner = None
+
+    def reset(self, pos):
+        """
+        Compute all the terms of `pos` from scratch
+        """
+        empty = BOARD_MASK & ~pos.mask()
+        static = 0
+        for channel in range(2):
+            pieces = pos.pieces[channel]
+            bits = pieces
+            while bits:
+                low = bits & -bits
+                static += POSITION_SIGNS[channel] * self.bit_weights[low.bit_length() - 1]
+                bits ^= low
+            static += TWO_WEIGHTS[channel] * count_two_in_row(pieces)
+            static += THREE_WEIGHTS[channel] * count_three_in_row(pieces, empty)
+        self.static = static
+        self.threats = (pos.winning_cells(0), pos.winning_cells(1))
+        self.winner = 0 if pos.is_win(0) else (1 if pos.is_win(1) else None)
+        self._stack = []
+        self._key = pos.hash
+
+    def push(self, pos, bit, channel):
+        """
+        Update the terms after `channel` dropped a piece on `bit` (already played on `pos`)
+        """
+        if self._key != pos.hash ^ ZOBRIST[channel][bit] ^ ZOBRIST_SIDE:
+            # Not the position we were following: start again from it
+            self.reset(pos)
+            return
+        threats = self.threats
+        static = self.static
+        self._stack.append((static, threats, self.winner))
+
+        pieces = pos.pieces
+        mine = pieces[channel]
+        mask = pieces[0] | pieces[1]
+        static += self._piece_values[channel][bit]
+        # A window through or next to `bit` always contains one of its neighbors
+        neighbors = NEIGHBORS[bit]
+        if mask & neighbors:
+            empty = BOARD_MASK & ~mask
+            if mine & neighbors:
+                static += TWO_WEIGHTS[channel] * (mine & neighbors).bit_count()
+                three_weight = THREE_WEIGHTS[channel]
+                for triple, ends in TRIPLES_THROUGH[bit]:
+                    if mine & triple == triple and empty & ends:
+                        static += three_weight
+            for triple, other_end in TRIPLES_ENDING[bit]:
+                if not empty & other_end:
+                    # `bit` was the only open end of these windows
+                    if pieces[0] & triple == triple:
+                        static -= THREE_WEIGHTS[0]
+                    elif pieces[1] & triple == triple:
+                        static -= THREE_WEIGHTS[1]
+        self.static = static
+
+        if self.winner is None and (threats[channel] >> bit) & 1:
+            self.winner = channel
+        if channel == 0:
+            self.threats = (winning_cells(mine, mask), threats[1] & ~(1 << bit))
+        else:
+            self.threats = (threats[0] & ~(1 << bit), winning_cells(mine, mask))
+        self._key = pos.hash
+
+    def pop(self, pos):
+        """
+        Restore the terms before the last move (already undone on `pos`)
+        """
+        if not self._stack:
+            self._key = None
+            return
+        self.static, self.threats, self.winner = self._stack.pop()
+        self._key = pos.hash
+
+    def evaluate(self, pos):
+        """
+        Score of `pos` from the point of view of channel 0
+
+        Returns:
+            float: score (positive = good for us)
+        """
+        if self._key != pos.hash:
+            self.reset(pos)
+        if self.winner == 0:
+            return 100000
+        if self.winner == 1:
+            return -100000
+        if self.threats[1] & pos.playable_mask():
+            return float(self.static - 5000)
+        return float(self.static)
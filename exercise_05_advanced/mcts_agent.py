@@ -0,0 +1,444 @@
+"""
+Monte Carlo Tree Search agent
+"""
+
+import math
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from bitboard import Bitboard, BOARD_MASK, BOTTOM_MASK, COLS, COLUMN_BITS, ROWS, MOVE_ORDER, winning_cells, wins_at
+
+ROLLOUT_POLICIES = ("random", "tactical")
+PARALLEL_MODES = ("tree", "root")
+
+COLUMN_MASKS = [((1 << ROWS) - 1) << (col * COLUMN_BITS) for col in range(COLS)]
+
+# Result of a game for the channel that made the last move
+WIN, DRAW = 1.0, 0.5
+
+
+class Node:
+    """
+    Node of the search tree: the position after `move`, played by `channel`
+    """
+    __slots__ = ("move", "channel", "parent", "children", "untried", "visits", "wins", "terminal")
+
+    def __init__(self, move, channel, parent, untried, terminal=None):
+        """
+        Parameters:
+            move: column played to reach the node (None for the root)
+            channel: channel that played `move` (for the root: the channel that moved last)
+            parent: parent Node, None for the root
+            untried: columns not expanded yet
+            terminal: None if the game goes on, else the result for `channel` (WIN or DRAW)
+        """
+        self.move = move
+        self.channel = channel
+        self.parent = parent
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.0
+        self.terminal = terminal
+
+    def best_child(self, exploration):
+        """
+        UCT selection: child with the best win rate plus exploration bonus
+        """
+        log_visits = math.log(self.visits)
+        return max(self.children,
+                   key=lambda c: c.wins / c.visits + exploration * math.sqrt(log_visits / c.visits))
+
+
+def _moves(mask):
+    """
+    Playable columns of a position, center first
+    """
+    return [col for col in MOVE_ORDER if not (mask >> (col * COLUMN_BITS + ROWS - 1)) & 1]
+
+
+def rollout_random(pieces, mask, channel, rng):
+    """
+    Play uniformly random moves until the end of the game
+
+    Parameters:
+        pieces: [pieces of channel 0, pieces of channel 1] (modified)
+        mask: bitboard of all the pieces
+        channel: channel to move
+        rng: random.Random
+
+    Returns:
+        int or None: winning channel, None for a draw
+    """
+    while mask != BOARD_MASK:
+        playable = (mask + BOTTOM_MASK) & BOARD_MASK
+        cells = [playable & m for m in COLUMN_MASKS if playable & m]
+        bit = rng.choice(cells)
+        pieces[channel] |= bit
+        mask |= bit
+        if wins_at(pieces[channel], bit.bit_length() - 1):
+            return channel
+        channel = 1 - channel
+    return None
+
+
+def rollout_tactical(pieces, mask, channel, rng):
+    """
+    Play the tactical rules of SmartAgent (exercise_03_rule_based/smart_agent_improved.py)
+    until the end of the game: win immediately, block the opponent, never
+    play below a winning cell of the opponent, otherwise a random move.
+
+    Parameters and return value as rollout_random
+    """
+    while mask != BOARD_MASK:
+        playable = (mask + BOTTOM_MASK) & BOARD_MASK
+        if winning_cells(pieces[channel], mask) & playable:
+            return channel
+        theirs = winning_cells(pieces[1 - channel], mask)
+        forced = theirs & playable
+        if forced:
+            candidates = forced
+        else:
+            candidates = playable & ~(theirs >> 1) or playable
+        cells = [candidates & m for m in COLUMN_MASKS if candidates & m]
+        bit = rng.choice(cells)
+        # No winning cell was playable: this move cannot win
+        pieces[channel] |= bit
+        mask |= bit
+        channel = 1 - channel
+    return None
+
+
+ROLLOUTS = {"random": rollout_random, "tactical": rollout_tactical}
+
+
+def _add_child(node, pieces, mask, move):
+    """
+    Play `move` from `node` and add the child it leads to
+
+    Parameters:
+        node: parent Node
+        pieces: pieces of both channels at `node` (modified: the move is played)
+        mask: bitboard of all the pieces at `node`
+        move: column to play
+
+    Returns:
+        tuple: (child Node, mask after the move)
+    """
+    channel = 1 - node.channel
+    bit = (mask + BOTTOM_MASK) & COLUMN_MASKS[move]
+    pieces[channel] |= bit
+    mask |= bit
+    if wins_at(pieces[channel], bit.bit_length() - 1):
+        terminal = WIN
+    elif mask == BOARD_MASK:
+        terminal = DRAW
+    else:
+        terminal = None
+    child = Node(move, channel, node, _moves(mask) if terminal is None else [], terminal)
+    node.children.append(child)
+    return child, mask
+
+
+def _root_parallel_worker(pos, totals, duration, max_playouts, seed, options):
+    """
+    Search the root in a worker process, starting from the merged root
+    statistics of the previous rounds
+
+    Parameters:
+        pos: Bitboard position, channel 0 to move
+        totals: {move: (visits, wins)} merged so far
+        duration: search time in seconds
+        max_playouts: Optional number of playouts instead of the duration
+        seed: seed of the random generator
+        options: exploration and rollout_policy of the agent
+
+    Returns:
+        tuple: ({move: (visits, wins)} added by this search, number of playouts)
+    """
+    agent = MCTSAgent(None, time_limit=duration, max_playouts=max_playouts, reuse_tree=False, seed=seed, **options)
+    mask = pos.mask()
+    root = Node(None, 1, None, _moves(mask))
+    for move, (visits, wins) in totals.items():
+        root.untried.remove(move)
+        child, _ = _add_child(root, pos.pieces[:], mask, move)
+        child.visits = visits
+        child.wins = wins
+        root.visits += visits
+    playouts = agent._search(root, pos, time.perf_counter())
+    added = {}
+    for child in root.children:
+        visits, wins = totals.get(child.move, (0, 0.0))
+        added[child.move] = (child.visits - visits, child.wins - wins)
+    return added, playouts
+
+
+class MCTSAgent:
+    """
+    Agent using Monte Carlo Tree Search with UCT selection
+
+    The tree is kept between moves: when the next observation is the
+    position after our move and one of the opponent replies already in the
+    tree, that subtree becomes the new root.
+    """
+    def __init__(self, env, player_name=None, time_limit=1.0, max_playouts=None, exploration=1.41,
+                 rollout_policy="tactical", reuse_tree=True, seed=None, workers=1, parallel="tree",
+                 virtual_loss=1, merge_rounds=4):
+        """
+        Initialize MCTS agent
+
+        Parameters:
+            env: PettingZoo environment
+            player_name: Optional name
+            time_limit: Thinking time per move in seconds
+            max_playouts: Optional number of playouts per move (None = until time_limit)
+            exploration: UCT exploration constant
+            rollout_policy: "random" or "tactical" (win / block / avoid rules)
+            reuse_tree: keep the subtree of the actual position between moves
+            seed: seed of the random generator
+            workers: number of threads ("tree") or processes ("root"); 1 = serial search
+            parallel: "tree" (threads sharing one tree, with virtual loss) or "root"
+                (one tree per process, root statistics merged after every round)
+            virtual_loss: visits added to the nodes of a path while a thread's playout is running
+            merge_rounds: number of merges of the root statistics per move in "root" mode
+        """
+        if rollout_policy not in ROLLOUT_POLICIES:
+            raise ValueError(f"rollout_policy must be one of {ROLLOUT_POLICIES}, got {rollout_policy!r}")
+        if parallel not in PARALLEL_MODES:
+            raise ValueError(f"parallel must be one of {PARALLEL_MODES}, got {parallel!r}")
+        if workers < 1 or virtual_loss < 1:
+            raise ValueError("workers and virtual_loss must be at least 1")
+        self.env = env
+        self.player_name = player_name or "MCTS"
+        self.time_limit = time_limit
+        self.max_playouts = max_playouts
+        self.exploration = exploration
+        self.rollout_policy = rollout_policy
+        self._rollout = ROLLOUTS[rollout_policy]
+        self.reuse_tree = reuse_tree
+        self.rng = random.Random(seed)
+        self.workers = workers
+        self.parallel = parallel
+        self.virtual_loss = virtual_loss
+        self.merge_rounds = merge_rounds
+        self._pool = None
+        self._root = None
+        self._root_pos = None
+        self.last_search_info = {}
+
+    def choose_action(self, observation, reward=0.0, terminated=False, truncated=False, info=None, action_mask=None):
+        """
+        Choose action using Monte Carlo Tree Search
+        """
+        start = time.perf_counter()
+        pos = Bitboard.from_observation(observation)
+        if self.workers > 1 and self.parallel == "root":
+            root, playouts = self._root_parallel_search(pos, start)
+            reused = 0
+        else:
+            root, reused = self._find_root(pos)
+            if self.workers > 1:
+                playouts = self._tree_parallel_search(root, pos, start)
+            else:
+                playouts = self._search(root, pos, start)
+
+        elapsed = time.perf_counter() - start
+        self.last_search_info = {
+            "playouts": playouts,
+            "time": elapsed,
+            "playouts_per_sec": playouts / elapsed if elapsed > 0 else 0.0,
+            "value": None,
+            "visits": {c.move: c.visits for c in root.children},
+            "reused_visits": reused,
+            "workers": self.workers,
+        }
+        if not root.children:
+            # No playout finished (no time left or max_playouts=0): play the most central legal move
+            self._root = None
+            return pos.valid_moves()[0]
+
+        best = max(root.children, key=lambda c: c.visits)
+        self.last_search_info["value"] = best.wins / best.visits
+        if self.reuse_tree and not (self.workers > 1 and self.parallel == "root"):
+            self._root = root
+            self._root_pos = pos
+        return best.move
+
+    def _find_root(self, pos):
+        """
+        Root of the search for `pos`: the matching grandchild of the previous
+        root (our move, then the opponent reply), or a new node
+
+        Returns:
+            tuple: (root Node, number of visits it already has)
+        """
+        if self._root is not None and pos.moves == self._root_pos.moves + 2:
+            for ours in self._root.children:
+                for theirs in ours.children:
+                    candidate = self._root_pos.copy()
+                    candidate.play(ours.move, 0)
+                    candidate.play(theirs.move, 1)
+                    if candidate.pieces == pos.pieces:
+                        theirs.parent = None
+                        return theirs, theirs.visits
+        # Channel 1 moved last: channel 0 (us) is to move at the root
+        return Node(None, 1, None, _moves(pos.mask())), 0
+
+    def _search(self, root, pos, start):
+        """
+        Run playouts from `root` until the time limit or max_playouts
+
+        Returns:
+            int: number of playouts
+        """
+        deadline = start + self.time_limit
+        playouts = 0
+        while True:
+            if self.max_playouts is not None:
+                if playouts >= self.max_playouts:
+                    break
+            elif time.perf_counter() > deadline:
+                break
+            self._playout(root, pos)
+            playouts += 1
+        return playouts
+
+    def _tree_parallel_search(self, root, pos, start):
+        """
+        Tree parallelism: `workers` threads run playouts on the same tree.
+        Selection, expansion and backpropagation hold a lock, rollouts run
+        outside it. Virtual loss steers the threads to different paths.
+
+        Returns:
+            int: number of playouts
+        """
+        deadline = start + self.time_limit
+        lock = threading.Lock()
+        counts = [0] * self.workers
+        remaining = [self.max_playouts]
+
+        def run(index, rng):
+            while True:
+                if remaining[0] is not None:
+                    with lock:
+                        if remaining[0] <= 0:
+                            return
+                        remaining[0] -= 1
+                elif time.perf_counter() > deadline:
+                    return
+                self._playout(root, pos, rng, lock)
+                counts[index] += 1
+
+        threads = [threading.Thread(target=run, args=(i, random.Random(self.rng.getrandbits(64))))
+                   for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sum(counts)
+
+    def _root_parallel_search(self, pos, start):
+        """
+        Root parallelism: every worker process grows its own tree from the
+        root. The time is split in `merge_rounds` rounds; after each round the
+        root statistics of all the workers are summed, and the next round of
+        every worker starts from the sums.
+
+        Returns:
+            tuple: (root Node holding the merged statistics, number of playouts)
+        """
+        pool = self._get_pool()
+        options = {"exploration": self.exploration, "rollout_policy": self.rollout_policy}
+        totals = {}
+        playouts = 0
+        deadline = start + self.time_limit
+        per_task = None
+        if self.max_playouts is not None:
+            per_task = -(-self.max_playouts // (self.merge_rounds * self.workers))
+        for round_index in range(self.merge_rounds):
+            duration = max(0.0, deadline - time.perf_counter()) / (self.merge_rounds - round_index)
+            futures = [pool.submit(_root_parallel_worker, pos, totals, duration, per_task,
+                                   self.rng.getrandbits(64), options) for _ in range(self.workers)]
+            merged = dict(totals)
+            for future in futures:
+                added, count = future.result()
+                playouts += count
+                for move, (visits, wins) in added.items():
+                    old_visits, old_wins = merged.get(move, (0, 0.0))
+                    merged[move] = (old_visits + visits, old_wins + wins)
+            totals = merged
+
+        root = Node(None, 1, None, [])
+        for move, (visits, wins) in totals.items():
+            child = Node(move, 0, root, [])
+            child.visits = visits
+            child.wins = wins
+            root.children.append(child)
+            root.visits += visits
+        return root, playouts
+
+    def _get_pool(self):
+        """
+        Start the worker processes of the root-parallel search on first use
+        """
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def close(self):
+        """
+        Shut down the worker processes, if any
+        """
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def _playout(self, root, pos, rng=None, lock=None):
+        """
+        One iteration: selection, expansion, rollout and backpropagation
+
+        Parameters:
+            root: root Node
+            pos: Bitboard position of the root
+            rng: random generator of the thread (default: the agent's)
+            lock: tree lock of the tree-parallel search, None when serial
+        """
+        rng = rng or self.rng
+        virtual_loss = self.virtual_loss if lock is not None else 0
+        pieces = pos.pieces[:]
+        mask = pieces[0] | pieces[1]
+
+        with lock or nullcontext():
+            node = root
+            node.visits += virtual_loss
+            # Selection
+            while not node.untried and node.children and node.terminal is None:
+                node = node.best_child(self.exploration)
+                node.visits += virtual_loss
+                bit = (mask + BOTTOM_MASK) & COLUMN_MASKS[node.move]
+                pieces[node.channel] |= bit
+                mask |= bit
+
+            # Expansion
+            if node.untried and node.terminal is None:
+                move = node.untried.pop(rng.randrange(len(node.untried)))
+                node, mask = _add_child(node, pieces, mask, move)
+                node.visits += virtual_loss
+
+        # Rollout
+        if node.terminal is not None:
+            winner = node.channel if node.terminal == WIN else None
+        else:
+            winner = self._rollout(pieces, mask, 1 - node.channel, rng)
+
+        # Backpropagation (and removal of the virtual loss)
+        with lock or nullcontext():
+            while node is not None:
+                node.visits += 1 - virtual_loss
+                if winner is None:
+                    node.wins += DRAW
+                elif winner == node.channel:
+                    node.wins += WIN
+                node = node.parent
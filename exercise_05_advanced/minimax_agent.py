@@ -5,45 +5,326 @@ Minimax agent with alpha-beta pruning
 import time
 import numpy as np
 import random
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
 #from loguru import logger
+from bitboard import (Bitboard, BOARD_MASK, COLUMN_BITS, ROWS, COLS, count_two_in_row, count_three_in_row, wins_at,
+                      mirror_move)
+from transposition_table import TranspositionTable, SharedTranspositionTable, MAX_DEPTH, EXACT, LOWER, UPPER, NO_MOVE
+from evaluation import IncrementalEvaluator
+from endgame_solver import EndgameSolver, SolverTimeout, describe
+from opening_book import OpeningBook
+from vectorized_eval import POSITION_WEIGHTS
+
+WIN_SCORE = 100000
+
+ALGORITHMS = ("alphabeta", "pvs")
+ROOT_DRIVERS = ("full", "aspiration", "mtdf")
+PARALLEL_MODES = ("root", "lazysmp")
+
+# Bound type seen from the other side (negamax values change sign)
+_FLIP_BOUND = {EXACT: EXACT, LOWER: UPPER, UPPER: LOWER}
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when the deadline is reached
+    """
+
+
+# Agent of a worker process of the parallel search, created by _init_worker
+_worker_agent = None
+
+
+def _init_worker(options, stop_event=None):
+    """
+    Create the agent of a worker process (its transposition table is kept between tasks)
+
+    Parameters:
+        options: keyword arguments of MinimaxAgent
+        stop_event: multiprocessing.Event that stops the Lazy SMP helpers
+    """
+    global _worker_agent
+    _worker_agent = MinimaxAgent(None, **options)
+    _worker_agent._stop_event = stop_event
+
+
+def _search_root_move(pos, move, deadline):
+    """
+    Search one root move by iterative deepening, in a worker process
+
+    Parameters:
+        pos: Bitboard position, channel 0 to move
+        move: root move to search
+        deadline: time.time() at which the search stops, None for no limit
+
+    Returns:
+        dict: move, values (value of the move at each completed depth), nodes and pv
+    """
+    agent = _worker_agent
+    start = time.perf_counter()
+    agent._deadline = start + (deadline - time.time()) if deadline is not None else None
+    agent.transposition.new_search()
+    agent._iterative_deepening(pos, [move], start)
+    info = agent.last_search_info
+    return {"move": move, "values": info["values_per_depth"], "nodes": info["nodes"], "pv": info["pv"]}
+
+
+def _lazy_smp_helper(pos, root_moves, deadline, age, index):
+    """
+    Search the whole root in a Lazy SMP helper process, filling the shared
+    transposition table, until the deadline or the stop event
+
+    Parameters:
+        pos: Bitboard position, channel 0 to move
+        root_moves: candidate columns
+        deadline: time.time() at which the search stops, None for no limit
+        age: age of the current search in the shared table
+        index: helper number (1, 2...), seeds the move order perturbation
+
+    Returns:
+        dict: depth reached and nodes
+    """
+    agent = _worker_agent
+    start = time.perf_counter()
+    agent._deadline = start + (deadline - time.time()) if deadline is not None else None
+    agent.transposition.age = age
+    # Each helper explores the tree in a different order: rotated root moves
+    # and random history scores (halved, not erased, by _new_search_ordering)
+    rng = random.Random(index)
+    shift = index % len(root_moves)
+    root_moves = list(root_moves[shift:]) + list(root_moves[:shift])
+    for table in agent._history:
+        for i in range(len(table)):
+            table[i] += rng.randrange(64)
+    agent._iterative_deepening(pos, root_moves, start)
+    info = agent.last_search_info
+    return {"depth": info["depth"], "nodes": info["nodes"]}
+
+
+def merge_root_results(results):
+    """
+    Pick the best root move from the results of the root-parallel search.
+    The moves are compared at the deepest depth that every move completed,
+    except for proven wins and losses, which hold at any depth.
+
+    Parameters:
+        results: dicts returned by _search_root_move, in root move order
+
+    Returns:
+        tuple: (depth, value, move), or None if no move completed depth 1
+    """
+    finished = [r for r in results if r["values"]]
+    if not finished:
+        return None
+    open_depths = [len(r["values"]) for r in finished if abs(r["values"][-1]) < WIN_SCORE]
+    depth = min(open_depths) if open_depths else max(len(r["values"]) for r in finished)
+    best = None
+    for r in finished:
+        values = r["values"]
+        value = values[-1] if abs(values[-1]) >= WIN_SCORE else values[depth - 1]
+        if best is None or value > best[1]:
+            best = (depth, value, r["move"])
+    return best
 
 
 class MinimaxAgent:
     """
     Agent using minimax algorithm with alpha-beta pruning
     """
-    def __init__(self, env, player_name=None):
+    def __init__(self, env, player_name=None, tt_size_mb=16, transposition=None, time_limit=2.0, max_depth=None,
+                 algorithm="alphabeta", root_driver="full", aspiration_window=50, workers=1, parallel="root",
+                 solver_empty=20, opening_book=None, ponder=False, ponder_time=None):
         """
         Initialize minimax agent
 
         Parameters:
             env: PettingZoo environment
-            depth: How many moves to look ahead
             player_name: Optional name
+            tt_size_mb: Memory budget of the transposition table
+            transposition: Optional TranspositionTable to reuse (e.g. across games)
+            time_limit: Thinking time per move in seconds
+            max_depth: Optional depth limit of the iterative deepening (None = until time_limit)
+            algorithm: "alphabeta" (max/min minimax) or "pvs" (negamax Principal Variation Search)
+            root_driver: how each iteration is searched at the root: "full" window,
+                "aspiration" window around the previous value, or "mtdf" zero-window passes
+            aspiration_window: initial half-width of the aspiration window
+            workers: number of processes; above 1, the search runs in parallel
+            parallel: "root" (root moves split over the workers) or "lazysmp" (every
+                worker searches the whole root, sharing one transposition table)
+            solver_empty: number of empty cells at or below which the endgame is
+                solved exactly (None = never)
+            opening_book: Optional OpeningBook, or path of a book file, played when the position is in it
+            ponder: if True, keep searching in a background thread between moves: the
+                position after the predicted reply (from the PV), or after every reply.
+                The thread shares the interpreter with the opponent if it runs in the
+                same process and then slows it down (GIL): only ponder against an
+                opponent running in another process
+            ponder_time: seconds of pondering after each move (None = time_limit)
         """
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"algorithm must be one of {ALGORITHMS}, got {algorithm!r}")
+        if root_driver not in ROOT_DRIVERS:
+            raise ValueError(f"root_driver must be one of {ROOT_DRIVERS}, got {root_driver!r}")
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1, got {workers!r}")
+        if parallel not in PARALLEL_MODES:
+            raise ValueError(f"parallel must be one of {PARALLEL_MODES}, got {parallel!r}")
         self.env = env
-        self.depth = 4
-        self.player_name = player_name or f"Minimax(d={self.depth})"
-        self.POSITION_WEIGHTS = np.array([
-            [10, 10 , 10 , 10 , 10 , 10 , 10],
-            [10, 50 , 50 , 50 , 50 , 50 , 10],
-            [10, 50 , 100, 200, 100, 50 , 10],
-            [25, 50 , 100, 300, 100, 50 , 25],
-            [50, 100, 200, 300, 200, 100, 50],
-            [75, 100, 200, 300, 200, 100, 75],
-        ])
-        self.transposition = {}
-        self.time_limit = 2.0
+        self.algorithm = algorithm
+        self.root_driver = root_driver
+        self.aspiration_window = aspiration_window
+        self.max_depth = max_depth
+        self.tt_size_mb = tt_size_mb
+        self.workers = workers
+        self.parallel = parallel
+        self._pool = None
+        # Set in Lazy SMP helper processes and in the pondering agent only
+        self._stop_event = None
+        self._helpers_stop = None
+        self.ponder = ponder
+        self.ponder_time = ponder_time
+        self._ponderer = None
+        self._ponder_thread = None
+        self.ponder_depths = {}
+        self.player_name = player_name or (f"Minimax(d={max_depth})" if max_depth else "Minimax(ID)")
+        # Same table as the vectorized evaluator, so that both give the same scores
+        self.POSITION_WEIGHTS = POSITION_WEIGHTS
+        # Position weight of every bit of a Bitboard (sentinel bits weigh 0)
+        self._bit_weights = [0] * (COLS * COLUMN_BITS)
+        for row in range(ROWS):
+            for col in range(COLS):
+                self._bit_weights[col * COLUMN_BITS + (ROWS - 1 - row)] = int(self.POSITION_WEIGHTS[row, col])
+        # Leaf evaluation terms, updated by _make_move_inplace / _undo_move_inplace
+        self._evaluator = IncrementalEvaluator(self._bit_weights)
+        # Kept across moves and games, entries of older searches are replaced first
+        if transposition is None:
+            lazy_smp = workers > 1 and parallel == "lazysmp"
+            transposition = SharedTranspositionTable(tt_size_mb) if lazy_smp else TranspositionTable(tt_size_mb)
+        self.transposition = transposition
+        self.solver_empty = solver_empty
+        self.solver = EndgameSolver(tt_size_mb) if solver_empty is not None else None
+        self._owns_book = isinstance(opening_book, str)
+        self.opening_book = OpeningBook(opening_book) if self._owns_book else opening_book
+        self.time_limit = time_limit
         self._deadline = None
+        self.nodes = 0
+        self.researches = 0
+        self.root_searches = 0
+        self.last_search_info = {}
+        # Move ordering: 2 killer moves per ply (move number) and a history
+        # score per (channel, column, row) indexed like the bitboard bits
+        self._killers = [[NO_MOVE, NO_MOVE] for _ in range(ROWS * COLS + 1)]
+        self._history = [[0] * (COLS * COLUMN_BITS) for _ in range(2)]
 
     def choose_action(self, observation, reward=0.0, terminated=False, truncated=False, info=None, action_mask=None):
         """
         Choose action using minimax algorithm
+
+        Returns None when the game is over (terminated or truncated).
+        """
+        ponder_depths = self._stop_pondering()
+        if terminated or truncated:
+            return None
+        action = self._select_action(observation)
+        if self.ponder:
+            key = Bitboard.from_observation(observation).hash
+            self.last_search_info.update(ponder_hit=key in ponder_depths, ponder_depth=ponder_depths.get(key, 0))
+            self._start_pondering(observation, action)
+        return action
+
+    def _start_pondering(self, observation, action):
+        """
+        Search, in a background thread, the positions we may face at the next
+        move: after `action` and the reply predicted by the principal
+        variation, or after every reply if there is no prediction.
+        The helper agent shares our transposition table, so the next search
+        finds the pondered subtrees there.
+
+        Parameters:
+            observation: observation of the current move
+            action: column we are playing
+        """
+        pos = Bitboard.from_observation(observation)
+        pos.play(action, 0)
+        if pos.is_win_at(action, 0):
+            return
+        pv = self.last_search_info.get("pv") or []
+        if len(pv) > 1 and pv[0] == action and pos.can_play(pv[1]):
+            replies = [pv[1]]
+        else:
+            replies = pos.valid_moves()
+        positions = []
+        for reply in replies:
+            child = pos.copy()
+            child.play(reply, 1)
+            if not child.is_win_at(reply, 1) and child.valid_moves():
+                positions.append(child)
+        if not positions:
+            return
+
+        if self._ponderer is None:
+            self._ponderer = MinimaxAgent(None, transposition=self.transposition, max_depth=self.max_depth,
+                                          algorithm=self.algorithm, root_driver=self.root_driver,
+                                          aspiration_window=self.aspiration_window, solver_empty=None)
+            self._ponderer._stop_event = threading.Event()
+        self._ponderer._stop_event.clear()
+        self._ponderer.ponder_depths = {}
+        ponder_time = self.time_limit if self.ponder_time is None else self.ponder_time
+        self._ponder_thread = threading.Thread(target=self._ponderer._ponder, args=(positions, ponder_time),
+                                               daemon=True)
+        self._ponder_thread.start()
+
+    def _stop_pondering(self):
+        """
+        Stop the pondering thread, if any
+
+        Returns:
+            dict: {position key: depth completed} of the pondered positions
+        """
+        if self._ponder_thread is None:
+            return {}
+        self._ponderer._stop_event.set()
+        self._ponder_thread.join()
+        self._ponder_thread = None
+        return self._ponderer.ponder_depths
+
+    def _ponder(self, positions, ponder_time):
+        """
+        Body of the pondering thread, run by the helper agent until its stop
+        event is set or `ponder_time` has passed, so that a game that ends
+        without another call to choose_action leaves no search running
+
+        Parameters:
+            positions: Bitboard positions, channel 0 to move
+            ponder_time: time budget in seconds
+        """
+        self._deadline = time.perf_counter() + ponder_time
+        if len(positions) == 1:
+            depth_limits = [None]
+        else:
+            # Every reply one depth at a time, the table keeps the previous depths
+            depth_limits = range(2, ROWS * COLS + 1)
+        for depth_limit in depth_limits:
+            for pos in positions:
+                # A stopped search leaves `pos` in the middle of the tree: read the key first
+                key = pos.hash
+                self._iterative_deepening(pos, pos.valid_moves(), time.perf_counter(), depth_limit)
+                self.ponder_depths[key] = self.last_search_info["depth"]
+                if self._stop_event.is_set() or time.perf_counter() > self._deadline:
+                    return
+
+    def _select_action(self, observation):
+        """
+        Choose the move of `observation`: win/block rules, opening book,
+        endgame solver, tactical rules, then the search (Rule 7)
         """
         start = time.perf_counter()
         self._deadline = start + self.time_limit
+        self.last_search_info = {}
 
-        self.transposition.clear()
+        self.transposition.new_search()
         valid_actions = self._get_valid_moves(observation)
         
         # Rule 1: Win immediately
@@ -56,6 +337,31 @@ class MinimaxAgent:
         if blocking_move is not None and blocking_move in valid_actions:
             return blocking_move
         
+        # Book move in the opening
+        if self.opening_book is not None:
+            entry = self.opening_book.lookup(Bitboard.from_observation(observation))
+            if entry is not None and entry[0] in valid_actions:
+                self.last_search_info = {"algorithm": "book", "value": entry[1], "pv": [entry[0]],
+                                         "time": time.perf_counter() - start}
+                return entry[0]
+
+        # Exact play when the endgame can be solved, with at most half of the time
+        if self.solver is not None:
+            pos = Bitboard.from_observation(observation)
+            if pos.empty_count() <= self.solver_empty:
+                self.solver.nodes = 0
+                try:
+                    action, score = self.solver.best_move(pos, 0, start + self.time_limit / 2)
+                except SolverTimeout:
+                    pass
+                else:
+                    result, distance = describe(score, pos.moves)
+                    elapsed = time.perf_counter() - start
+                    self.last_search_info = {"algorithm": "solver", "value": score, "result": result,
+                                             "distance": distance, "nodes": self.solver.nodes, "time": elapsed,
+                                             "pv": [action]}
+                    return action
+
         # Rule 3: Block double threat
         block_double_threat = self._find_block_double_two_spot(observation, channel=0)
         if block_double_threat is not None and block_double_threat in valid_actions:
@@ -85,37 +391,325 @@ class MinimaxAgent:
                 #logger.info(f"{self.player_name}: DOUBLE THREAT -> column {a}")
                 return a
 
-        # Rule 7: Minimax
-        best_action = None
-        best_value = float('-inf')
+        # Rule 7: Minimax with iterative deepening, on a bitboard copy of the observation
+        pos = Bitboard.from_observation(observation)
+        if self.workers > 1 and self.parallel == "lazysmp":
+            best_action = self._lazy_smp_search(pos, candidate_actions, start)
+        elif self.workers > 1 and len(candidate_actions) > 1:
+            best_action = self._parallel_root_search(pos, candidate_actions, start)
+        else:
+            best_action = self._iterative_deepening(pos, candidate_actions, start)
+        return best_action if best_action is not None else random.choice(valid_actions)
 
-        # Try each valid action
-        for action in candidate_actions:
-            if self._deadline is not None and time.perf_counter() > self._deadline:
+    def _iterative_deepening(self, pos, root_moves, start, depth_limit=None):
+        """
+        Search depth 1, 2, 3... until the deadline and keep the best move
+        of the last completed iteration.
+
+        Parameters:
+            pos: Bitboard position, channel 0 to move
+            root_moves: candidate columns
+            start: time at which the move started
+            depth_limit: Optional depth limit of this search, below max_depth
+
+        Returns:
+            int: column to play
+        """
+        root_moves = list(root_moves)
+        best_action = root_moves[0] if root_moves else None
+        max_depth = pos.empty_count()
+        for limit in (self.max_depth, depth_limit):
+            if limit is not None:
+                max_depth = min(max_depth, limit)
+        self.nodes = 0
+        self.researches = 0
+        self.root_searches = 0
+        self._new_search_ordering()
+        self._evaluator.reset(pos)
+        self.last_search_info = {"algorithm": self.algorithm, "root_driver": self.root_driver, "depth": 0,
+                                 "value": None, "nodes": 0, "time": 0.0, "nps": 0.0, "researches": 0,
+                                 "root_researches": 0, "pv": [], "nodes_per_depth": [], "values_per_depth": []}
+
+        value = None
+        for depth in range(1, max_depth + 1):
+            searches_before = self.root_searches
+            try:
+                if self.root_driver == "mtdf":
+                    value, action, scores = self._mtdf(pos, root_moves, depth, value)
+                elif self.root_driver == "aspiration" and value is not None:
+                    value, action, scores = self._aspiration_search(pos, root_moves, depth, value)
+                else:
+                    value, action, scores = self._search_root(pos, root_moves, depth)
+            except SearchTimeout:
+                # The unfinished iteration is thrown away
+                break
+            best_action = action
+            self.last_search_info.update(depth=depth, value=value, pv=self._principal_variation(pos, depth, action))
+            self.last_search_info["nodes_per_depth"].append(self.nodes)
+            self.last_search_info["values_per_depth"].append(value)
+            self.last_search_info["root_researches"] += self.root_searches - searches_before - 1
+            # Next iteration: previous best move first, then the others by score
+            root_moves.sort(key=lambda a: (a != action, -scores[a]))
+            if abs(value) >= WIN_SCORE:
                 break
-            # Simulate the move
-            new_board = self._simulate_move(observation, action, channel=0)
 
-            # Evaluate using minimax (opponent's turn, so minimizing)
-            effective_depth = self._adaptive_depth(new_board)
-            value = self._minimax(new_board, effective_depth, float('-inf'), float('inf'), False)
-            #logger.debug(f"{self.player_name}: Action {action} -> minimax score {value}")
+        elapsed = time.perf_counter() - start
+        self.last_search_info.update(nodes=self.nodes, time=elapsed, researches=self.researches,
+                                     nps=self.nodes / elapsed if elapsed > 0 else 0.0)
+        return best_action
+
+    def _parallel_root_search(self, pos, root_moves, start):
+        """
+        Root-parallel search: each root move is searched by iterative deepening
+        in a worker process until the deadline. When there are more moves than
+        workers, the remaining time is shared between the waves of moves.
+
+        Parameters:
+            pos: Bitboard position, channel 0 to move
+            root_moves: candidate columns
+            start: time at which the move started
+
+        Returns:
+            int: column to play
+        """
+        root_moves = list(root_moves)
+        pool = self._get_pool()
+        waves = -(-len(root_moves) // self.workers)
+        now = time.time()
+        remaining = None if self._deadline is None else max(0.0, self._deadline - time.perf_counter())
+        futures = []
+        for i, move in enumerate(root_moves):
+            deadline = None if remaining is None else now + remaining * (i // self.workers + 1) / waves
+            futures.append(pool.submit(_search_root_move, pos, move, deadline))
+        done, not_done = wait(futures, timeout=None if remaining is None else remaining + 0.05)
+        for future in not_done:
+            future.cancel()
+        results = [future.result() for future in futures if future in done]
+
+        merged = merge_root_results(results)
+        depth, value, best_action = merged if merged is not None else (0, None, root_moves[0])
+        pv = next((r["pv"] for r in results if r["move"] == best_action), [])
+        nodes = sum(r["nodes"] for r in results)
+        elapsed = time.perf_counter() - start
+        self.nodes = nodes
+        self.last_search_info = {"algorithm": self.algorithm, "root_driver": self.root_driver, "depth": depth,
+                                 "value": value, "nodes": nodes, "time": elapsed,
+                                 "nps": nodes / elapsed if elapsed > 0 else 0.0, "researches": 0,
+                                 "root_researches": 0, "pv": pv, "nodes_per_depth": [], "values_per_depth": [],
+                                 "workers": self.workers,
+                                 "move_values": {r["move"]: r["values"] for r in results}}
+        return best_action
+
+    def _lazy_smp_search(self, pos, root_moves, start):
+        """
+        Lazy SMP: this process and `workers - 1` helper processes search the
+        same root, each with a different move order, and share the
+        transposition table, so each one mostly finds the subtrees the
+        others already searched. The move of this process is played; the
+        helpers are stopped when it is done.
+
+        Parameters:
+            pos: Bitboard position, channel 0 to move
+            root_moves: candidate columns
+            start: time at which the move started
+
+        Returns:
+            int: column to play
+        """
+        pool = self._get_pool()
+        self._helpers_stop.clear()
+        deadline = None
+        if self._deadline is not None:
+            deadline = time.time() + max(0.0, self._deadline - time.perf_counter())
+        futures = [pool.submit(_lazy_smp_helper, pos, list(root_moves), deadline, self.transposition.age, index)
+                   for index in range(1, self.workers)]
+        best_action = self._iterative_deepening(pos, root_moves, start)
+        self._helpers_stop.set()
+        done, _ = wait(futures, timeout=0.1)
+        helper_nodes = sum(future.result()["nodes"] for future in done)
+        info = self.last_search_info
+        info.update(workers=self.workers, helper_nodes=helper_nodes,
+                    helper_depths=[future.result()["depth"] for future in done])
+        return best_action
+
+    def _get_pool(self):
+        """
+        Start the worker processes of the parallel search on first use
+        """
+        if self._pool is None:
+            options = {"tt_size_mb": self.tt_size_mb, "max_depth": self.max_depth, "algorithm": self.algorithm,
+                       "root_driver": self.root_driver, "aspiration_window": self.aspiration_window}
+            if self.parallel == "lazysmp":
+                # Helpers attach to the shared table of this agent
+                options["transposition"] = self.transposition
+                self._helpers_stop = multiprocessing.Event()
+                self._pool = ProcessPoolExecutor(max_workers=self.workers - 1, initializer=_init_worker,
+                                                 initargs=(options, self._helpers_stop))
+            else:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                 initargs=(options,))
+        return self._pool
+
+    def close(self):
+        """
+        Shut down the worker processes of the parallel search, if any,
+        release the shared transposition table and close the opening book file.
+        Also stops pondering.
+        """
+        self._stop_pondering()
+        if self._pool is not None:
+            if self._helpers_stop is not None:
+                self._helpers_stop.set()
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+        if isinstance(self.transposition, SharedTranspositionTable):
+            self.transposition.close()
+        if self._owns_book:
+            self.opening_book.close()
+            self.opening_book = None
+            self._owns_book = False
+
+    def _aspiration_search(self, pos, root_moves, depth, guess):
+        """
+        Search the root with a narrow window around the previous iteration's value.
+        When the result falls outside, the window is widened (doubled) on that
+        side and the root is searched again.
+
+        Returns:
+            tuple: (best value, best move, {move: value})
+        """
+        delta = self.aspiration_window
+        alpha, beta = guess - delta, guess + delta
+        while True:
+            value, action, scores = self._search_root(pos, root_moves, depth, alpha, beta)
+            if value <= alpha:
+                alpha = value - delta
+            elif value >= beta:
+                beta = value + delta
+            else:
+                return value, action, scores
+            delta *= 2
+
+    def _mtdf(self, pos, root_moves, depth, guess):
+        """
+        MTD(f): converge on the root value with zero-window searches.
+        Each pass proves the value is above or below a test value; the
+        transposition table makes the successive passes cheap.
 
+        Parameters:
+            guess: first guess of the value (previous iteration), None if unknown
+
+        Returns:
+            tuple: (best value, best move, {move: value})
+        """
+        g = guess if guess is not None else 0
+        lower, upper = float('-inf'), float('inf')
+        result = None
+        while lower < upper:
+            beta = max(g, lower + 1)
+            value, action, scores = self._search_root(pos, root_moves, depth, beta - 1, beta)
+            g = value
+            if g < beta:
+                upper = g
+            else:
+                lower = g
+                # Only a fail-high pass proves that `action` reaches the value
+                result = (g, action, scores)
+        return result
+
+    def _search_root(self, pos, root_moves, depth, alpha=float('-inf'), beta=float('inf')):
+        """
+        Search every root move to `depth` plies (root move included) inside the
+        window (alpha, beta). The returned value is fail-soft: at most alpha
+        if all the moves fail low, at least beta on a cutoff.
+        With PVS, the moves after the first one are searched with a zero
+        window and re-searched only if they beat the best value.
+
+        Returns:
+            tuple: (best value, best move, {move: value})
+        """
+        self.root_searches += 1
+        alpha_orig = alpha
+        best_value = float('-inf')
+        best_action = root_moves[0]
+        scores = {}
+        for i, action in enumerate(root_moves):
+            row = self._make_move_inplace(pos, action, channel=0)
+            if pos.is_win_at(action, 0):
+                value = WIN_SCORE
+            elif self.algorithm == "pvs":
+                if i == 0:
+                    value = -self._pvs(pos, depth - 1, -beta, -alpha, 1)
+                else:
+                    value = -self._pvs(pos, depth - 1, -alpha - 1, -alpha, 1)
+                    if alpha < value < beta:
+                        self.researches += 1
+                        value = -self._pvs(pos, depth - 1, -beta, -alpha, 1)
+            else:
+                value = self._minimax(pos, depth - 1, alpha, beta, False)
+            self._undo_move_inplace(pos, action, row, channel=0)
+            scores[action] = value
             if value > best_value:
                 best_value = value
                 best_action = action
+            alpha = max(alpha, best_value)
+            if alpha >= beta:
+                break
+        for action in root_moves:
+            scores.setdefault(action, float('-inf'))
+
+        # The value only belongs to the position if every legal move was searched
+        # (not after Rule 4 or for a single root move of a parallel worker)
+        if len(root_moves) == len(pos.valid_moves()):
+            if best_value <= alpha_orig:
+                flag = UPPER
+            elif best_value >= beta:
+                flag = LOWER
+            else:
+                flag = EXACT
+            key, mirrored = pos.canonical_key()
+            self.transposition.store(key, depth, best_value, flag,
+                                     mirror_move(best_action) if mirrored else best_action)
+        return best_value, best_action, scores
+
+    def _principal_variation(self, pos, depth, root_move=None):
+        """
+        Follow the best moves stored in the transposition table
 
-        if best_action is None:
-            return candidate_actions[0] if candidate_actions else valid_actions[0]
-        
-        return best_action if best_action is not None else random.choice(valid_actions)
+        Parameters:
+            pos: Bitboard position, channel 0 to move
+            depth: maximum length of the variation
+            root_move: first move of the variation, None to read it from the table too
+
+        Returns:
+            list: columns of the principal variation, starting with the root move
+        """
+        pv = []
+        pos = pos.copy()
+        channel = 0
+        if root_move is not None:
+            pv.append(root_move)
+            pos.play(root_move, channel)
+            channel = 1
+        while len(pv) < depth:
+            key, mirrored = pos.canonical_key()
+            entry = self.transposition.probe(key)
+            if entry is None or entry[3] == NO_MOVE:
+                break
+            move = mirror_move(entry[3]) if mirrored else entry[3]
+            if not pos.can_play(move):
+                break
+            pv.append(move)
+            pos.play(move, channel)
+            channel = 1 - channel
+        return pv
 
-    def _minimax(self, board, depth, alpha, beta, maximizing):
+    def _minimax(self, pos, depth, alpha, beta, maximizing):
         """
         Minimax algorithm with alpha-beta pruning
 
         Parameters:
-            board: Current board state
+            pos: Current position (Bitboard)
             depth: Remaining depth to search
             alpha: Best value for maximizer
             beta: Best value for minimizer
@@ -124,76 +718,257 @@ class MinimaxAgent:
         Returns:
             float: evaluation score
         """
-        # TODO: Implement minimax
-        # Base cases:
-        #   - depth == 0: return evaluate(board)
-        #   - game over: return win/loss score
-
-        # Recursive case:
-        #   - Try all valid moves
-        #   - Recursively evaluate
-        #   - Update alpha/beta
-        #   - Prune if possible
+        self.nodes += 1
         if self._deadline is not None and time.perf_counter() > self._deadline:
-            return 0.0 
+            # Unwind the whole iteration: partial values are never stored nor played
+            raise SearchTimeout()
+        if self._stop_event is not None and not self.nodes & 1023 and self._stop_event.is_set():
+            raise SearchTimeout()
         
-        key = (board.tobytes(), maximizing)
-
-        if key in self.transposition:
-            return self.transposition[key]
+        # The Zobrist key already encodes the side to move. A position and its
+        # mirror image share one entry, whose move is stored mirrored if needed
+        key = pos.hash
+        mirrored = pos.mirror_hash < key
+        if mirrored:
+            key = pos.mirror_hash
+
+        hash_move = None
+        entry = self.transposition.probe(key)
+        if entry is not None:
+            value, entry_depth, flag, move = entry
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return value
+                if flag == LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+            if move != NO_MOVE:
+                hash_move = mirror_move(move) if mirrored else move
+        alpha_orig, beta_orig = alpha, beta
         
-        if self._check_win(board, 0):
-            val = 100000
-            self.transposition[key] = val
-            return val
-        if self._check_win(board, 1):
-            val = -100000
-            self.transposition[key] = val
-            return val
+        # Wins are detected right after the move that makes them (see below)
         if depth == 0:
-            val = self._evaluate(board)
-            self.transposition[key] = val
+            val = self._evaluator.evaluate(pos)
+            self.transposition.store(key, depth, val)
             return val
         
-        valid_moves = self._get_valid_moves(board)
+        valid_moves = pos.valid_moves()
         if not valid_moves:
-            val = self._evaluate(board)
-            self.transposition[key] = val
+            val = self._evaluator.evaluate(pos)
+            self.transposition.store(key, MAX_DEPTH, val)
             return val
+
+        channel = 0 if maximizing else 1
+        valid_moves = self._order_moves(pos, valid_moves, channel, hash_move)
         
+        best_move = NO_MOVE
         if maximizing:
-            max_eval = float('-inf')
+            best_eval = float('-inf')
             for col in valid_moves:
-                #new_board = self._simulate_move(board, col, channel=0)
-                #eval = self._minimax(new_board, depth - 1, alpha, beta, False)
-                row = self._make_move_inplace(board, col, channel=0)
+                row = self._make_move_inplace(pos, col, channel=0)
                 if row is None:
                     continue
-                eval = self._minimax(board, depth - 1, alpha, beta, False)
-                max_eval = max(max_eval, eval)
-                alpha = max(alpha, max_eval)
-                self._undo_move_inplace(board, col, row, channel=0)
+                if pos.is_win_at(col, 0):
+                    eval = WIN_SCORE
+                else:
+                    eval = self._minimax(pos, depth - 1, alpha, beta, False)
+                self._undo_move_inplace(pos, col, row, channel=0)
+                if eval > best_eval:
+                    best_eval = eval
+                    best_move = col
+                alpha = max(alpha, best_eval)
                 if beta <= alpha:
+                    self._record_cutoff(pos, col, channel, depth)
                     break
-            self.transposition[key] = max_eval
-            return max_eval
         else:
-            min_eval = float('inf')
+            best_eval = float('inf')
             for col in valid_moves:
-                #new_board = self._simulate_move(board, col, channel=1)
-                #eval = self._minimax(new_board, depth - 1, alpha, beta, True)
-                row = self._make_move_inplace(board, col, channel=1)
+                row = self._make_move_inplace(pos, col, channel=1)
                 if row is None: 
                     continue
-                eval = self._minimax(board, depth - 1, alpha, beta, True)
-                min_eval = min(min_eval, eval)
-                beta = min(beta, min_eval)
-                self._undo_move_inplace(board, col, row, channel=1)
+                if pos.is_win_at(col, 1):
+                    eval = -WIN_SCORE
+                else:
+                    eval = self._minimax(pos, depth - 1, alpha, beta, True)
+                self._undo_move_inplace(pos, col, row, channel=1)
+                if eval < best_eval:
+                    best_eval = eval
+                    best_move = col
+                beta = min(beta, best_eval)
                 if beta <= alpha:
+                    self._record_cutoff(pos, col, channel, depth)
                     break
-            self.transposition[key] = min_eval
-            return min_eval
+
+        # A value outside the (alpha, beta) window is only a bound
+        if best_eval <= alpha_orig:
+            flag = UPPER
+        elif best_eval >= beta_orig:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.transposition.store(key, depth, best_eval, flag, mirror_move(best_move) if mirrored else best_move)
+        return best_eval
         
+    def _pvs(self, pos, depth, alpha, beta, channel):
+        """
+        Negamax Principal Variation Search with alpha-beta pruning
+
+        The first (best ordered) move is searched with the full window, the
+        others with a zero window (alpha, alpha + 1) that only proves they are
+        not better; a move that fails high is re-searched with the full window.
+
+        Parameters:
+            pos: Current position (Bitboard)
+            depth: Remaining depth to search
+            alpha: Lower bound, from the point of view of `channel`
+            beta: Upper bound, from the point of view of `channel`
+            channel: channel to move (0 = us, 1 = opponent)
+
+        Returns:
+            float: evaluation score from the point of view of `channel`
+        """
+        self.nodes += 1
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise SearchTimeout()
+        if self._stop_event is not None and not self.nodes & 1023 and self._stop_event.is_set():
+            raise SearchTimeout()
+
+        # The table stores values from the point of view of channel 0,
+        # under the canonical key of the position (see _minimax)
+        key = pos.hash
+        mirrored = pos.mirror_hash < key
+        if mirrored:
+            key = pos.mirror_hash
+        sign = 1 if channel == 0 else -1
+
+        hash_move = None
+        entry = self.transposition.probe(key)
+        if entry is not None:
+            value, entry_depth, flag, move = entry
+            if entry_depth >= depth:
+                value *= sign
+                if channel:
+                    flag = _FLIP_BOUND[flag]
+                if flag == EXACT:
+                    return value
+                if flag == LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+            if move != NO_MOVE:
+                hash_move = mirror_move(move) if mirrored else move
+        alpha_orig = alpha
+
+        # Wins are detected right after the move that makes them (see below)
+        if depth == 0:
+            val = self._evaluator.evaluate(pos)
+            self.transposition.store(key, depth, val)
+            return sign * val
+
+        valid_moves = pos.valid_moves()
+        if not valid_moves:
+            val = self._evaluator.evaluate(pos)
+            self.transposition.store(key, MAX_DEPTH, val)
+            return sign * val
+
+        valid_moves = self._order_moves(pos, valid_moves, channel, hash_move)
+        other = 1 - channel
+        best_eval = float('-inf')
+        best_move = NO_MOVE
+        for col in valid_moves:
+            row = self._make_move_inplace(pos, col, channel)
+            if pos.is_win_at(col, channel):
+                eval = WIN_SCORE
+            elif best_move == NO_MOVE:
+                eval = -self._pvs(pos, depth - 1, -beta, -alpha, other)
+            else:
+                eval = -self._pvs(pos, depth - 1, -alpha - 1, -alpha, other)
+                if alpha < eval < beta:
+                    self.researches += 1
+                    eval = -self._pvs(pos, depth - 1, -beta, -alpha, other)
+            self._undo_move_inplace(pos, col, row, channel)
+            if eval > best_eval:
+                best_eval = eval
+                best_move = col
+            alpha = max(alpha, best_eval)
+            if alpha >= beta:
+                self._record_cutoff(pos, col, channel, depth)
+                break
+
+        if best_eval <= alpha_orig:
+            flag = UPPER
+        elif best_eval >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        if channel:
+            flag = _FLIP_BOUND[flag]
+        self.transposition.store(key, depth, sign * best_eval, flag,
+                                 mirror_move(best_move) if mirrored else best_move)
+        return best_eval
+
+    def _new_search_ordering(self):
+        """
+        Reset the killer moves and age the history scores before a new search
+        """
+        for killers in self._killers:
+            killers[0] = killers[1] = NO_MOVE
+        for table in self._history:
+            for i in range(len(table)):
+                table[i] >>= 1
+
+    def _order_moves(self, pos, moves, channel, hash_move=None):
+        """
+        Sort the moves of a node: hash move, killer moves, then by history score.
+        Ties keep the center-first order of `moves`.
+
+        Parameters:
+            pos: Bitboard position
+            moves: valid columns in center-first order
+            channel: channel to move
+            hash_move: best move stored in the transposition table, or None
+
+        Returns:
+            list: ordered columns
+        """
+        killers = self._killers[pos.moves]
+        history = self._history[channel]
+        heights = pos.heights
+        keyed = []
+        for col in moves:
+            if col == hash_move:
+                score = 1 << 62
+            elif col == killers[0]:
+                score = 1 << 61
+            elif col == killers[1]:
+                score = 1 << 60
+            else:
+                score = history[col * COLUMN_BITS + heights[col]]
+            keyed.append((score, col))
+        keyed.sort(key=lambda item: item[0], reverse=True)
+        return [col for _, col in keyed]
+
+    def _record_cutoff(self, pos, col, channel, depth):
+        """
+        Remember a move that caused a beta cutoff at this ply
+
+        Parameters:
+            pos: Bitboard position before the move
+            col: column of the move
+            channel: channel that played it
+            depth: remaining depth of the node
+        """
+        killers = self._killers[pos.moves]
+        if killers[0] != col:
+            killers[1] = killers[0]
+            killers[0] = col
+        self._history[channel][col * COLUMN_BITS + pos.heights[col]] += depth * depth
+
     def _get_next_row(self, board, col): 
         """
         Find which row a piece would land in if dropped in column col
@@ -391,6 +1166,42 @@ class MinimaxAgent:
 
         return float(score)
 
+    def _evaluate_position(self, pos):
+        """
+        Evaluate a Bitboard position from scratch with the same scoring as `_evaluate`.
+        The search uses the incremental `self._evaluator`, which gives the same score.
+
+        Returns:
+            float: score (positive = good for us)
+        """
+        if pos.is_win(0):
+            return 100000
+        if pos.is_win(1):
+            return -100000
+
+        score = 0
+        if pos.can_win_next(1):
+            score -= 5000
+
+        mine, opp = pos.pieces
+        empty = BOARD_MASK & ~(mine | opp)
+        score += count_three_in_row(mine, empty) * 200 - count_three_in_row(opp, empty) * 50
+        score += count_two_in_row(mine) * 20 - count_two_in_row(opp) * 10
+        score += self._positional_sum(mine) - self._positional_sum(opp)
+        return float(score)
+
+    def _positional_sum(self, pieces):
+        """
+        Sum of POSITION_WEIGHTS over the cells of a bitboard
+        """
+        weights = self._bit_weights
+        total = 0
+        while pieces:
+            low = pieces & -pieces
+            total += weights[low.bit_length() - 1]
+            pieces ^= low
+        return total
+
     def _check_win(self, board, channel):
         """
         Check if player has won
@@ -398,23 +1209,7 @@ class MinimaxAgent:
         Returns:
             bool: True if won
         """
-        # TODO: Check all positions for 4 in a row
-        directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
-        for row in range(6):
-            for col in range(7):
-                if board[row, col, channel] != 1:
-                    continue
-                for dr, dc in directions:
-                    boundary = True
-                    for k in range(4): 
-                        r = row + dr * k
-                        c = col + dc * k
-                        if not (0 <= r < 6 and 0 <= c < 7 and board[r, c, channel] == 1):
-                            boundary = False
-                            break
-                    if boundary:
-                        return True
-        return False
+        return Bitboard.from_observation(board).is_win(channel)
     
     def _find_winning_move(self, board, channel):
         """
@@ -424,17 +1219,7 @@ class MinimaxAgent:
             If a four-in-a-row pattern is formed immediately after placing a piece 
             in a certain column, return the column number; otherwise, return None.
         """
-        valid_moves = self._get_valid_moves(board)
-        for col in valid_moves:
-            #new_board = self._simulate_move(board, col, channel=channel)
-            row = self._get_next_row(board, col)
-            board[row, col, channel] = 1
-            
-            if self._check_win(board, channel):
-                board[row, col, channel] = 0
-                return col
-            board[row, col, channel] = 0
-        return None
+        return Bitboard.from_observation(board).winning_column(channel)
     
     def _opponent_can_win_next(self, board, my_channel=0):
         """
@@ -455,21 +1240,19 @@ class MinimaxAgent:
         Returns:
             True if move creates double threat, False otherwise
         """
-        row=self._get_next_row(board, col)
-        if row is None:
+        pos = Bitboard.from_observation(board)
+        if pos.play(col, channel) is None:
             return False
-        board1 = board.copy()
-        board1[row,col,channel] = 1
-        if self._check_win(board1, channel):
+        if pos.is_win_at(col, channel):
             return False
+        pieces = pos.pieces[channel]
         count = 0
         for c in range(7):
-            row2=self._get_next_row(board1, c)
-            if row2 is None:
+            height = pos.heights[c]
+            if height >= ROWS:
                 continue
-            board2 = board1.copy()
-            board2[row2,c,channel] = 1
-            if self._check_win(board2,channel) == True:
+            bit = c * COLUMN_BITS + height
+            if wins_at(pieces | (1 << bit), bit):
                 count += 1
                 if count >= 2:
                     return True
@@ -484,33 +1267,21 @@ class MinimaxAgent:
         """
         if self._deadline is not None and time.perf_counter() > self._deadline:
             return False
-        board1 = self._simulate_move(board, a, channel)
+        pos = Bitboard.from_observation(board)
+        if pos.play(a, channel) is not None and pos.is_win_at(a, channel):
+            return True
         opp = 1 - channel
 
-        for b in self._get_valid_moves(board1):
+        for b in pos.valid_moves():
             if self._deadline is not None and time.perf_counter() > self._deadline:
                 return False
-            board2 = self._simulate_move(board1, b, opp)
-            if self._find_winning_move(board2, channel) is None:
+            pos.play(b, opp)
+            winning = pos.winning_column(channel)
+            pos.undo(b, opp)
+            if winning is None:
                 return False
         return True
 
-    def _adaptive_depth(self, board):
-        """
-        Adjust the search depth based on how many empty cells remain.
-        Deeper search in late-game, shallower in early-game.
-
-        Returns:
-            int: The adapted search depth.
-        """
-        empty = np.sum((board[:, :, 0] == 0) & (board[:, :, 1] == 0))
-        if empty <= 8:
-            return self.depth
-        elif empty <= 14:
-            return self.depth - 1
-        else:
-            return self.depth - 1
-
     def _is_double_two_spot(self, board, row, col, channel):
         """
         Check whether placing a piece of `channel` at (row, col) 
@@ -565,25 +1336,28 @@ class MinimaxAgent:
                 return col
         return None
 
-    def _make_move_inplace(self, board, col, channel):
+    def _make_move_inplace(self, pos, col, channel):
         """
         Place a piece for the given channel in column `col` (in-place) and return the row.
         If the column is full, return None.
 
+        Parameters:
+            pos: Bitboard position
+
         Returns:
             int or None: The row where the piece is placed, or None if the column is full.
         """
-        row = self._get_next_row(board, col)
-        if row is None:
-            return None
-        board[row, col, channel] = 1
+        row = pos.play(col, channel)
+        if row is not None:
+            self._evaluator.push(pos, col * COLUMN_BITS + (ROWS - 1 - row), channel)
         return row
 
-    def _undo_move_inplace(self, board, col, row, channel):
+    def _undo_move_inplace(self, pos, col, row, channel):
         """
         Undo a piece placed at (row, col, channel) (in-place).
 
         Returns:
             None
         """
-        board[row, col, channel] = 0
+        pos.undo(col, channel)
+        self._evaluator.pop(pos)
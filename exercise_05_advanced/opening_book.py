@@ -0,0 +1,105 @@
+"""
+Opening book: positions of the first plies searched offline, stored in a
+sorted binary file and looked up through mmap
+"""
+
+import mmap
+import struct
+from bitboard import BOTTOM_MASK, mirror, mirror_move
+
+MAGIC = b"C4BK"
+VERSION = 1
+# magic, version, max ply, search depth, number of records
+HEADER = struct.Struct("<4sHHHI")
+# position key, value, best move
+RECORD = struct.Struct("<QiB")
+
+
+def position_key(pos, channel=0):
+    """
+    Key of a position, the same for a position and its mirror image
+
+    The key of one orientation is the pieces of the side to move plus the
+    mask plus the bottom row, which identifies the position exactly.
+
+    Parameters:
+        pos: Bitboard position
+        channel: channel to move
+
+    Returns:
+        tuple: (key, mirrored) where mirrored is True if the key is the one of the mirror image
+    """
+    mine = pos.pieces[channel]
+    mask = pos.mask()
+    key = mine + mask + BOTTOM_MASK
+    mirrored_key = mirror(mine) + mirror(mask) + BOTTOM_MASK
+    if mirrored_key < key:
+        return mirrored_key, True
+    return key, False
+
+
+class OpeningBook:
+    """
+    Read-only opening book
+
+    The file is mapped in memory and binary-searched, so opening it is
+    instantaneous and the pages are shared by all the processes that read
+    the same file.
+    """
+    def __init__(self, path):
+        """
+        Parameters:
+            path: file written by build_opening_book.build_book
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.max_ply, self.depth, self.size = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not an opening book (version {VERSION})")
+
+    def __len__(self):
+        return self.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """
+        Unmap and close the file
+        """
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = None
+
+    def _record(self, index):
+        return RECORD.unpack_from(self._map, HEADER.size + index * RECORD.size)
+
+    def lookup(self, pos, channel=0):
+        """
+        Find a position in the book
+
+        Parameters:
+            pos: Bitboard position
+            channel: channel to move
+
+        Returns:
+            tuple or None: (best move, value for `channel`), None if the position is not in the book
+        """
+        key, mirrored = position_key(pos, channel)
+        low, high = 0, self.size
+        while low < high:
+            mid = (low + high) // 2
+            mid_key, value, move = self._record(mid)
+            if mid_key < key:
+                low = mid + 1
+            elif mid_key > key:
+                high = mid
+            else:
+                return (mirror_move(move) if mirrored else move), value
+        return None
@@ -0,0 +1,28 @@
+"""
+Random positions for the tests and the benchmarks
+"""
+
+import random
+import numpy as np
+
+
+def random_observation(num_moves, seed):
+    """
+    Play `num_moves` random moves and return the observation of the player to move
+
+    Parameters:
+        num_moves: number of moves to play
+        seed: seed of the random generator
+
+    Returns:
+        numpy array (6, 7, 2)
+    """
+    rng = random.Random(seed)
+    observation = np.zeros((6, 7, 2), dtype=np.int8)
+    for _ in range(num_moves):
+        cols = [c for c in range(7) if observation[0, c, 0] == 0 and observation[0, c, 1] == 0]
+        col = rng.choice(cols)
+        row = max(r for r in range(6) if observation[r, col, 0] == 0 and observation[r, col, 1] == 0)
+        observation[row, col, 0] = 1
+        observation = observation[:, :, ::-1].copy()
+    return observation
@@ -0,0 +1,132 @@
+import random
+import numpy as np
+from bitboard import Bitboard, WINNING_LINES, LINES_THROUGH, has_four, mirror, mirror_move
+from minimax_agent import MinimaxAgent
+from positions import random_observation
+
+def test_observation_round_trip():
+    '''
+    Test the conversion between observations and bitboards
+    '''
+    for seed in range(50):
+        observation = random_observation(seed % 30, seed)
+        pos = Bitboard.from_observation(observation)
+        assert np.array_equal(pos.to_observation(), observation)
+        assert pos.moves == int(observation.sum())
+
+def test_play_and_undo():
+    '''
+    Test that play/undo restore the position and return the observation row
+    '''
+    pos = Bitboard()
+    assert pos.play(3, 0) == 5
+    assert pos.play(3, 1) == 4
+    assert pos.heights[3] == 2
+    pos.undo(3, 1)
+    pos.undo(3, 0)
+    assert pos.pieces == [0, 0] and pos.heights == [0] * 7 and pos.moves == 0
+
+    for _ in range(6):
+        pos.play(0, 0)
+    assert pos.play(0, 0) is None
+    assert 0 not in pos.valid_moves()
+
+def test_is_win():
+    '''
+    Test win detection in the 4 directions
+    '''
+    for cells in ([(5, 0), (5, 1), (5, 2), (5, 3)],
+                  [(5, 6), (4, 6), (3, 6), (2, 6)],
+                  [(5, 0), (4, 1), (3, 2), (2, 3)],
+                  [(2, 3), (3, 4), (4, 5), (5, 6)]):
+        observation = np.zeros((6, 7, 2))
+        for row, col in cells:
+            observation[row, col, 1] = 1
+        pos = Bitboard.from_observation(observation)
+        assert pos.is_win(1)
+        assert not pos.is_win(0)
+
+def test_evaluation_matches_numpy():
+    '''
+    Test that the bitboard evaluation gives the same score as `_evaluate`
+    '''
+    agent = MinimaxAgent(None)
+    for seed in range(200):
+        observation = random_observation(seed % 35, seed)
+        pos = Bitboard.from_observation(observation)
+        assert agent._evaluate_position(pos) == agent._evaluate(observation)
+
+def test_zobrist_hash():
+    '''
+    Test that the incremental hash matches transpositions and is restored by undo
+    '''
+    pos1 = Bitboard()
+    for col, channel in [(3, 0), (2, 1), (4, 0), (2, 1)]:
+        pos1.play(col, channel)
+    pos2 = Bitboard()
+    for col, channel in [(4, 0), (2, 1), (3, 0), (2, 1)]:
+        pos2.play(col, channel)
+    assert pos1.hash == pos2.hash == pos1.compute_hash()
+
+    pos1.play(5, 0)
+    assert pos1.hash != pos2.hash
+    pos1.undo(5, 0)
+    assert pos1.hash == pos2.hash
+
+    observation = random_observation(12, 3)
+    assert Bitboard.from_observation(observation).hash == Bitboard.from_observation(observation.copy()).hash
+
+def test_winning_line_index():
+    '''
+    Test the 69 winning lines and the last-move win detection
+    '''
+    assert len(WINNING_LINES) == 69
+    assert all(line.bit_count() == 4 for line in WINNING_LINES)
+    assert sum(len(lines) for lines in LINES_THROUGH) == 4 * 69
+
+    rng = random.Random(5)
+    for _ in range(100):
+        pos = Bitboard()
+        channel = 0
+        while pos.valid_moves():
+            col = rng.choice(pos.valid_moves())
+            expected = pos.winning_column(channel)
+            pos.play(col, channel)
+            assert pos.is_win_at(col, channel) == has_four(pos.pieces[channel])
+            if pos.is_win_at(col, channel):
+                assert expected is not None
+                break
+            channel = 1 - channel
+
+def test_mirror_keys():
+    '''
+    Test that a position and its mirror image share the canonical key, with moves mapped back
+    '''
+    rng = random.Random(3)
+    pos = Bitboard()
+    mirror_pos = Bitboard()
+    channel = 0
+    for _ in range(20):
+        col = rng.choice(pos.valid_moves())
+        pos.play(col, channel)
+        mirror_pos.play(mirror_move(col), channel)
+        channel = 1 - channel
+        assert pos.mirror_hash == mirror_pos.hash
+        if pos.moves % 2 == 0:
+            # compute_hash assumes channel 0 to move
+            assert pos.mirror_hash == pos.compute_hash(mirrored=True)
+        assert pos.canonical_key()[0] == mirror_pos.canonical_key()[0]
+    assert mirror(pos.pieces[0]) == mirror_pos.pieces[0]
+    assert Bitboard.from_observation(pos.to_observation()).mirror_hash == pos.mirror_hash
+
+    # A move stored from one side is read back in the frame of the other
+    agent = MinimaxAgent(None, max_depth=4, time_limit=1000.0)
+    start = Bitboard()
+    start.play(0, 0)
+    start.play(1, 1)
+    mirrored_start = Bitboard()
+    mirrored_start.play(6, 0)
+    mirrored_start.play(5, 1)
+    action = agent._iterative_deepening(start, start.valid_moves(), 0.0)
+    agent.transposition.new_search()
+    assert agent._principal_variation(mirrored_start, 4)[0] == mirror_move(action)
@@ -0,0 +1,100 @@
+import random
+import time
+from bitboard import Bitboard
+from endgame_solver import EndgameSolver, SolverTimeout, describe, win_score
+from minimax_agent import MinimaxAgent
+
+def random_open_position(num_moves, seed):
+    '''
+    Play `num_moves` random moves that neither win nor leave a win on the next move
+
+    Parameters:
+        num_moves: number of moves to play
+        seed: seed of the random generator
+    Return:
+        pos, channel: Bitboard position and channel to move
+    '''
+    rng = random.Random(seed)
+    while True:
+        pos = Bitboard()
+        channel = 0
+        for _ in range(num_moves):
+            moves = [col for col in pos.valid_moves() if col != pos.winning_column(channel)]
+            if not moves:
+                break
+            pos.play(rng.choice(moves), channel)
+            channel = 1 - channel
+        else:
+            if not pos.can_win_next(0) and not pos.can_win_next(1):
+                return pos, channel
+
+def reference_score(pos, channel):
+    '''
+    Exact score by a full negamax without pruning
+    '''
+    best = None
+    for col in pos.valid_moves():
+        pos.play(col, channel)
+        if pos.is_win_at(col, channel):
+            value = win_score(pos.moves)
+        elif not pos.valid_moves():
+            value = 0
+        else:
+            value = -reference_score(pos, 1 - channel)
+        pos.undo(col, channel)
+        if best is None or value > best:
+            best = value
+    return best
+
+def test_solver_matches_reference():
+    '''
+    Test the solved score and the optimal move against a full search of small endgames
+    '''
+    solver = EndgameSolver(tt_size_mb=1)
+    for seed in range(15):
+        pos, channel = random_open_position(33, seed)
+        expected = reference_score(pos, channel)
+        assert solver.solve(pos, channel) == expected
+        col, score = solver.best_move(pos, channel)
+        assert score == expected
+        pos.play(col, channel)
+        if not pos.is_win_at(col, channel):
+            assert -reference_score(pos, 1 - channel) == expected
+
+def test_describe():
+    '''
+    Test the conversion of scores to results and distances
+    '''
+    assert describe(win_score(31), 30) == ("win", 1)
+    assert describe(-win_score(34), 30) == ("loss", 4)
+    assert describe(0, 30) == ("draw", 12)
+
+def test_solver_timeout():
+    '''
+    Test that the solver gives up at the deadline
+    '''
+    solver = EndgameSolver(tt_size_mb=1)
+    pos, channel = random_open_position(6, 0)
+    start = time.perf_counter()
+    try:
+        solver.solve(pos, channel, deadline=start + 0.05)
+        assert False, "the opening should not be solved in 50 ms"
+    except SolverTimeout:
+        pass
+    assert time.perf_counter() - start < 0.5
+
+def test_agent_plays_solved_move():
+    '''
+    Test that the agent plays the solver's move in a solvable endgame
+    '''
+    agent = MinimaxAgent(None, solver_empty=12)
+    for seed in range(5):
+        pos, channel = random_open_position(30, seed)
+        if channel == 1:
+            pos.swap_channels()
+        action = agent.choose_action(pos.to_observation())
+        info = agent.last_search_info
+        assert info["algorithm"] == "solver"
+        pos.play(action, 0)
+        if not pos.is_win_at(action, 0):
+            assert -EndgameSolver(1).solve(pos, 1) == info["value"]
@@ -0,0 +1,57 @@
+import random
+import numpy as np
+from bitboard import Bitboard
+from minimax_agent import MinimaxAgent
+from positions import random_observation
+from vectorized_eval import child_boards, evaluate_boards
+
+def test_incremental_matches_evaluate():
+    '''
+    Test that the incremental evaluator gives the score of `_evaluate` after every make and undo
+    '''
+    agent = MinimaxAgent(None)
+    rng = random.Random(7)
+    for _ in range(30):
+        pos = Bitboard()
+        agent._evaluator.reset(pos)
+        played = []
+        channel = 0
+        while pos.valid_moves():
+            col = rng.choice(pos.valid_moves())
+            row = agent._make_move_inplace(pos, col, channel)
+            played.append((col, row, channel))
+            assert agent._evaluator.evaluate(pos) == agent._evaluate(pos.to_observation())
+            if pos.is_win(channel):
+                break
+            channel = 1 - channel
+        while played:
+            col, row, channel = played.pop()
+            agent._undo_move_inplace(pos, col, row, channel)
+            assert agent._evaluator.evaluate(pos) == agent._evaluate(pos.to_observation())
+
+def test_evaluator_resynchronizes():
+    '''
+    Test that the evaluator follows a position it was not reset on
+    '''
+    agent = MinimaxAgent(None)
+    pos = Bitboard()
+    for col, channel in [(3, 0), (3, 1), (4, 0), (2, 1)]:
+        pos.play(col, channel)
+    row = agent._make_move_inplace(pos, 5, 0)
+    assert agent._evaluator.evaluate(pos) == agent._evaluate(pos.to_observation())
+    agent._undo_move_inplace(pos, 5, row, 0)
+    assert agent._evaluator.evaluate(pos) == agent._evaluate(pos.to_observation())
+
+def test_vectorized_matches_evaluate():
+    '''
+    Test that the vectorized evaluator gives the score of `_evaluate` on single boards and stacks
+    '''
+    agent = MinimaxAgent(None)
+    boards = [random_observation(n, seed) for seed in range(40) for n in (0, 7, 15, 24, 33)]
+    expected = [agent._evaluate(board) for board in boards]
+    assert [evaluate_boards(board) for board in boards] == expected
+    assert list(evaluate_boards(np.stack(boards))) == expected
+
+    columns, children = child_boards(boards[3], 1)
+    assert columns == sorted(Bitboard.from_observation(boards[3]).valid_moves())
+    assert list(evaluate_boards(children)) == [agent._evaluate(child) for child in children]
@@ -0,0 +1,103 @@
+import random
+import pytest
+from bitboard import Bitboard
+from mcts_agent import MCTSAgent, rollout_random, rollout_tactical
+
+def test_rollouts_end_the_game():
+    '''
+    Test that both rollout policies play a legal game to the end and report its winner
+    '''
+    rng = random.Random(0)
+    for rollout in (rollout_random, rollout_tactical):
+        for _ in range(50):
+            pieces = [0, 0]
+            winner = rollout(pieces, 0, 0, rng)
+            pos = Bitboard()
+            pos.pieces = pieces
+            if winner is None:
+                assert not pos.is_win(0) and not pos.is_win(1)
+                assert bin(pieces[0] | pieces[1]).count("1") == 42
+            elif rollout is rollout_random:
+                assert pos.is_win(winner)
+
+def test_plays_immediate_win_and_block():
+    '''
+    Test that the search finds a winning move and blocks the opponent
+    '''
+    pos = Bitboard()
+    for col, channel in [(0, 0), (6, 1), (1, 0), (6, 1), (2, 0), (5, 1)]:
+        pos.play(col, channel)
+    agent = MCTSAgent(None, max_playouts=2000, seed=1)
+    assert agent.choose_action(pos.to_observation()) == 3
+
+    pos = Bitboard()
+    for col, channel in [(0, 1), (6, 0), (1, 1), (5, 0), (2, 1)]:
+        pos.play(col, channel)
+    for policy in ("random", "tactical"):
+        agent = MCTSAgent(None, max_playouts=3000, rollout_policy=policy, seed=1)
+        assert agent.choose_action(pos.to_observation()) == 3
+
+def test_tree_reuse_and_report():
+    '''
+    Test that the subtree of the actual reply is kept and that playouts/sec is reported
+    '''
+    agent = MCTSAgent(None, max_playouts=3000, seed=2)
+    pos = Bitboard()
+    action = agent.choose_action(pos.to_observation())
+    info = agent.last_search_info
+    assert info["playouts"] == 3000 and info["playouts_per_sec"] > 0
+    assert sum(info["visits"].values()) == 3000
+    pos.play(action, 0)
+    pos.play(3, 1)
+    agent.choose_action(pos.to_observation())
+    assert agent.last_search_info["reused_visits"] > 0
+
+    agent = MCTSAgent(None, max_playouts=100, reuse_tree=False, seed=2)
+    agent.choose_action(Bitboard().to_observation())
+    assert agent._root is None
+
+def test_invalid_rollout_policy():
+    with pytest.raises(ValueError):
+        MCTSAgent(None, rollout_policy="smart")
+
+def test_tree_parallel_virtual_loss():
+    '''
+    Test that threads sharing the tree count every playout once and remove their virtual loss
+    '''
+    pos = Bitboard()
+    for col, channel in [(0, 1), (6, 0), (1, 1), (5, 0), (2, 1)]:
+        pos.play(col, channel)
+    agent = MCTSAgent(None, max_playouts=3000, workers=4, virtual_loss=3, seed=3)
+    assert agent.choose_action(pos.to_observation()) == 3
+    info = agent.last_search_info
+    assert info["playouts"] == 3000 and info["workers"] == 4
+    root = agent._root
+    assert root.visits == sum(c.visits for c in root.children) == 3000
+
+def test_root_parallel_merge():
+    '''
+    Test that the root statistics of the worker processes are merged
+    '''
+    pos = Bitboard()
+    for col, channel in [(0, 1), (6, 0), (1, 1), (5, 0), (2, 1)]:
+        pos.play(col, channel)
+    agent = MCTSAgent(None, max_playouts=2000, workers=2, parallel="root", merge_rounds=2, seed=4)
+    try:
+        assert agent.choose_action(pos.to_observation()) == 3
+        info = agent.last_search_info
+        assert info["playouts"] == 2000
+        assert sum(info["visits"].values()) == 2000
+    finally:
+        agent.close()
+
+def test_no_playout_plays_a_legal_move():
+    '''
+    Test that a search without any finished playout still returns a legal move
+    '''
+    pos = Bitboard()
+    for col in (3, 3, 3, 3, 3, 3):
+        pos.play(col, pos.moves % 2)
+    for agent in (MCTSAgent(None, time_limit=0.0), MCTSAgent(None, max_playouts=0)):
+        action = agent.choose_action(pos.to_observation())
+        assert pos.can_play(action)
+        assert agent.last_search_info["value"] is None or agent.last_search_info["playouts"] > 0
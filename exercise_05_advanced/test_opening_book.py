@@ -0,0 +1,56 @@
+import time
+from bitboard import Bitboard
+from build_opening_book import build_book
+from minimax_agent import MinimaxAgent
+from opening_book import OpeningBook, position_key
+
+def test_position_key_symmetry():
+    '''
+    Test that a position and its mirror image have the same key
+    '''
+    pos = Bitboard()
+    mirror = Bitboard()
+    for col, channel in [(0, 0), (3, 1), (1, 0), (1, 1)]:
+        pos.play(col, channel)
+        mirror.play(6 - col, channel)
+    key, mirrored = position_key(pos)
+    mirror_key, mirror_mirrored = position_key(mirror)
+    assert key == mirror_key and mirrored != mirror_mirrored
+    assert position_key(pos, 1)[0] != key
+
+def test_book_lookup(tmp_path):
+    '''
+    Test that the book gives the move and value of the search, for a position and its mirror image
+    '''
+    path = str(tmp_path / "book.bin")
+    count = build_book(path, max_ply=2, depth=4)
+    agent = MinimaxAgent(None, max_depth=4, solver_empty=None)
+    with OpeningBook(path) as book:
+        assert len(book) == count == 1 + 4 + 25
+        for first, second in [(0, 3), (6, 3), (2, 5), (4, 1)]:
+            pos = Bitboard()
+            pos.play(first, 1)
+            pos.play(second, 0)
+            pos.play(first, 1)
+            assert book.lookup(pos) is None
+            pos.undo(first, 1)
+            move, value = book.lookup(pos, channel=1)
+            pos.swap_channels()
+            agent.transposition.clear()
+            assert agent._iterative_deepening(pos, pos.valid_moves(), time.perf_counter()) == move
+            assert agent.last_search_info["value"] == value
+
+def test_agent_plays_book_move(tmp_path):
+    '''
+    Test that the agent answers from the book without searching
+    '''
+    path = str(tmp_path / "book.bin")
+    build_book(path, max_ply=1, depth=3)
+    agent = MinimaxAgent(None, opening_book=path)
+    try:
+        action = agent.choose_action(Bitboard().to_observation())
+        assert agent.last_search_info["algorithm"] == "book"
+        with OpeningBook(path) as book:
+            assert action == book.lookup(Bitboard())[0]
+    finally:
+        agent.close()
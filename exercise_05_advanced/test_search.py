@@ -0,0 +1,259 @@
+import time
+from bitboard import Bitboard
+from minimax_agent import MinimaxAgent
+from positions import random_observation
+
+def reference_minimax(agent, pos, depth, maximizing):
+    '''
+    Plain minimax without pruning nor transposition table
+
+    Parameters:
+        agent: MinimaxAgent used for the evaluation
+        pos: Bitboard position
+        depth: remaining depth
+        maximizing: True if channel 0 is to move
+    Return:
+        value: minimax value of the position
+    '''
+    if pos.is_win(0):
+        return 100000
+    if pos.is_win(1):
+        return -100000
+    moves = pos.valid_moves()
+    if depth == 0 or not moves:
+        return agent._evaluate_position(pos)
+    channel = 0 if maximizing else 1
+    values = []
+    for col in moves:
+        pos.play(col, channel)
+        values.append(reference_minimax(agent, pos, depth - 1, not maximizing))
+        pos.undo(col, channel)
+    return max(values) if maximizing else min(values)
+
+def test_minimax_matches_reference():
+    '''
+    Test that alpha-beta with a persistent transposition table keeps exact values
+    '''
+    agent = MinimaxAgent(None, tt_size_mb=1)
+    agent.time_limit = 1000.0
+    for seed in range(20):
+        pos = Bitboard.from_observation(random_observation(4 + seed, seed))
+        if pos.is_win(0) or pos.is_win(1):
+            continue
+        for depth in (1, 2, 3):
+            agent.transposition.new_search()
+            expected = reference_minimax(agent, pos, depth, True)
+            assert agent._minimax(pos, depth, float('-inf'), float('inf'), True) == expected
+            # Narrow windows leave bounds in the table, which must not corrupt later searches
+            agent._minimax(pos, depth, expected - 1, expected + 1, True)
+            agent._minimax(pos, depth, expected + 1, expected + 50, True)
+            assert agent._minimax(pos, depth, float('-inf'), float('inf'), True) == expected
+
+def test_iterative_deepening_value():
+    '''
+    Test that the last completed iteration gives the exact minimax value
+    '''
+    agent = MinimaxAgent(None, max_depth=4, time_limit=1000.0)
+    for seed in range(5):
+        observation = random_observation(6 + seed, seed)
+        pos = Bitboard.from_observation(observation)
+        action = agent._iterative_deepening(pos, pos.valid_moves(), 0.0)
+        assert agent.last_search_info["depth"] == 4
+        assert agent.last_search_info["pv"][0] == action
+        expected = reference_minimax(agent, pos, 4, True)
+        assert agent.last_search_info["value"] == expected
+        pos.play(action, 0)
+        assert reference_minimax(agent, pos, 3, False) == expected
+
+def test_time_limit():
+    '''
+    Test that a short time limit still gives a legal move from a finished iteration
+    '''
+    agent = MinimaxAgent(None, time_limit=0.05)
+    observation = random_observation(0, 0)
+    start = time.perf_counter()
+    action = agent.choose_action(observation)
+    assert time.perf_counter() - start < 0.5
+    assert action in range(7)
+    assert agent.last_search_info["depth"] >= 1
+
+def test_move_ordering():
+    '''
+    Test the order hash move, killer moves, history, then center-first
+    '''
+    agent = MinimaxAgent(None)
+    pos = Bitboard()
+    moves = pos.valid_moves()
+    assert agent._order_moves(pos, moves, 0) == [3, 2, 4, 1, 5, 0, 6]
+
+    agent._record_cutoff(pos, 6, 0, 2)
+    agent._record_cutoff(pos, 0, 0, 3)
+    assert agent._order_moves(pos, moves, 0)[:2] == [0, 6]
+    assert agent._order_moves(pos, moves, 0, hash_move=5)[:3] == [5, 0, 6]
+
+    # History only: the move with the most cutoffs comes first
+    agent._new_search_ordering()
+    assert agent._order_moves(pos, moves, 0)[:3] == [0, 6, 3]
+    assert agent._order_moves(pos, moves, 1) == [3, 2, 4, 1, 5, 0, 6]
+
+def test_pvs_matches_reference():
+    '''
+    Test that Principal Variation Search gives the minimax value, on its own and in iterative deepening
+    '''
+    agent = MinimaxAgent(None, tt_size_mb=1, algorithm="pvs")
+    for seed in range(20):
+        pos = Bitboard.from_observation(random_observation(4 + seed, seed))
+        if pos.is_win(0) or pos.is_win(1):
+            continue
+        for depth in (1, 2, 3):
+            agent.transposition.new_search()
+            expected = reference_minimax(agent, pos, depth, True)
+            assert agent._pvs(pos, depth, float('-inf'), float('inf'), 0) == expected
+            # Zero-window searches return bounds on the correct side
+            assert agent._pvs(pos, depth, expected - 1, expected, 0) >= expected
+            assert agent._pvs(pos, depth, expected, expected + 1, 0) <= expected
+            assert agent._pvs(pos, depth, float('-inf'), float('inf'), 0) == expected
+
+    for seed in range(5):
+        pos = Bitboard.from_observation(random_observation(6 + seed, seed))
+        pvs = MinimaxAgent(None, max_depth=5, time_limit=1000.0, algorithm="pvs")
+        alphabeta = MinimaxAgent(None, max_depth=5, time_limit=1000.0)
+        pvs._iterative_deepening(pos, pos.valid_moves(), 0.0)
+        alphabeta._iterative_deepening(pos, pos.valid_moves(), 0.0)
+        assert pvs.last_search_info["value"] == alphabeta.last_search_info["value"]
+
+def test_root_drivers_match_full_window():
+    '''
+    Test that aspiration windows and MTD(f) find the same value as a full-window search
+    '''
+    for algorithm in ("alphabeta", "pvs"):
+        for seed in range(5):
+            pos = Bitboard.from_observation(random_observation(6 + seed, seed))
+            values = []
+            for root_driver in ("full", "aspiration", "mtdf"):
+                agent = MinimaxAgent(None, max_depth=5, time_limit=1000.0, algorithm=algorithm,
+                                     root_driver=root_driver, aspiration_window=10)
+                action = agent._iterative_deepening(pos, pos.valid_moves(), 0.0)
+                values.append(agent.last_search_info["value"])
+                assert agent.last_search_info["root_researches"] >= 0
+                pos.play(action, 0)
+                assert reference_minimax(agent, pos, 4, False) == values[-1]
+                pos.undo(action, 0)
+            assert values[0] == values[1] == values[2]
+
+def test_partial_root_not_stored():
+    '''
+    Test that searching a subset of the root moves leaves no entry for the root position
+    '''
+    agent = MinimaxAgent(None, max_depth=3, time_limit=1000.0, tt_size_mb=1)
+    for seed in range(5):
+        pos = Bitboard.from_observation(random_observation(6 + seed, seed))
+        if pos.is_win(0) or pos.is_win(1):
+            continue
+        agent.transposition.clear()
+        agent._deadline = None
+        moves = pos.valid_moves()
+        agent._iterative_deepening(pos, moves[-1:], time.perf_counter())
+        assert agent.last_search_info["pv"][0] == moves[-1]
+        assert agent.transposition.probe(pos.canonical_key()[0]) is None
+        expected = reference_minimax(agent, pos, 3, True)
+        assert agent._minimax(pos, 3, float('-inf'), float('inf'), True) == expected
+
+def test_parallel_root_search():
+    '''
+    Test that the root-parallel search finds the value of the serial search
+    '''
+    serial = MinimaxAgent(None, max_depth=4, time_limit=1000.0)
+    parallel = MinimaxAgent(None, max_depth=4, time_limit=1000.0, workers=2)
+    try:
+        for seed in range(3):
+            pos = Bitboard.from_observation(random_observation(6 + seed, seed))
+            serial._iterative_deepening(pos, pos.valid_moves(), time.perf_counter())
+            parallel._deadline = None
+            action = parallel._parallel_root_search(pos, pos.valid_moves(), time.perf_counter())
+            info = parallel.last_search_info
+            assert info["depth"] == 4
+            assert info["value"] == serial.last_search_info["value"]
+            assert info["move_values"][action][-1] == info["value"]
+            assert info["nodes"] > 0
+    finally:
+        parallel.close()
+
+def test_parallel_time_limit():
+    '''
+    Test that the parallel search honors the time limit
+    '''
+    agent = MinimaxAgent(None, time_limit=0.3, workers=2)
+    try:
+        agent.choose_action(random_observation(0, 0))
+        start = time.perf_counter()
+        action = agent.choose_action(random_observation(2, 1))
+        assert time.perf_counter() - start < 0.6
+        assert action in range(7)
+    finally:
+        agent.close()
+
+def test_lazy_smp_search():
+    '''
+    Test that Lazy SMP with a shared transposition table keeps the value of the serial search
+    '''
+    serial = MinimaxAgent(None, max_depth=5, time_limit=1000.0)
+    lazy = MinimaxAgent(None, max_depth=5, time_limit=1000.0, workers=3, parallel="lazysmp", tt_size_mb=1)
+    try:
+        for seed in range(3):
+            pos = Bitboard.from_observation(random_observation(6 + seed, seed))
+            serial._iterative_deepening(pos, pos.valid_moves(), time.perf_counter())
+            lazy.transposition.new_search()
+            lazy._deadline = None
+            lazy._lazy_smp_search(pos, pos.valid_moves(), time.perf_counter())
+            assert lazy.last_search_info["depth"] == 5
+            assert lazy.last_search_info["value"] == serial.last_search_info["value"]
+            assert lazy.last_search_info["workers"] == 3
+    finally:
+        lazy.close()
+
+def test_pondering():
+    '''
+    Test that the position after the predicted reply is searched between moves and recognized
+    '''
+    agent = MinimaxAgent(None, time_limit=0.2, ponder=True)
+    try:
+        pos = Bitboard()
+        action = agent.choose_action(pos.to_observation())
+        pv = agent.last_search_info["pv"]
+        assert pv[0] == action and len(pv) > 1
+        assert agent.last_search_info["ponder_hit"] is False
+        time.sleep(0.3)
+        pos.play(action, 0)
+        pos.play(pv[1], 1)
+        agent.choose_action(pos.to_observation())
+        assert agent.last_search_info["ponder_hit"] is True
+        assert agent.last_search_info["ponder_depth"] >= 1
+        # A reply that was not predicted is not a hit
+        pos = Bitboard()
+        action = agent.choose_action(pos.to_observation())
+        pos.play(action, 0)
+        pos.play(next(c for c in pos.valid_moves() if c != agent.last_search_info["pv"][1]), 1)
+        agent.choose_action(pos.to_observation())
+        assert agent.last_search_info["ponder_hit"] is False
+    finally:
+        agent.close()
+    assert agent._ponder_thread is None
+
+def test_pondering_stops_by_itself():
+    '''
+    Test that pondering ends after its time budget, and at once on a terminal observation
+    '''
+    agent = MinimaxAgent(None, time_limit=0.1, ponder=True, ponder_time=0.2)
+    try:
+        agent.choose_action(Bitboard().to_observation())
+        thread = agent._ponder_thread
+        assert thread.is_alive()
+        thread.join(2.0)
+        assert not thread.is_alive()
+
+        agent.choose_action(Bitboard().to_observation())
+        assert agent.choose_action(Bitboard().to_observation(), terminated=True) is None
+        assert agent._ponder_thread is None
+    finally:
+        agent.close()
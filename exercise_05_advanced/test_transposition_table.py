@@ -0,0 +1,85 @@
+import gc
+import pickle
+from multiprocessing import shared_memory
+import pytest
+from transposition_table import TranspositionTable, SharedTranspositionTable, EXACT, LOWER, UPPER, NO_MOVE
+
+def test_store_and_probe():
+    '''
+    Test that an entry keeps its value, depth, bound type and best move
+    '''
+    tt = TranspositionTable(size_mb=0.01)
+    tt.store(12345, 3, -250.0, LOWER, 6)
+    tt.store(777, 0, 100000)
+    assert tt.probe(12345) == (-250, 3, LOWER, 6)
+    assert tt.probe(777) == (100000, 0, EXACT, NO_MOVE)
+    assert tt.probe(54321) is None
+    tt.store(12345, 4, 80, UPPER, 0)
+    assert tt.probe(12345) == (80, 4, UPPER, 0)
+    stats = tt.stats()
+    assert stats["stores"] == 3 and stats["hits"] == 3 and stats["probes"] == 4
+
+def test_bounded_size():
+    '''
+    Test that the number of entries never exceeds the memory budget
+    '''
+    tt = TranspositionTable(size_mb=0.01)
+    for key in range(10000):
+        tt.store(key * 7919, 1, key)
+    stats = tt.stats()
+    assert stats["entries"] <= tt.num_slots
+    assert tt.num_slots * TranspositionTable.ENTRY_BYTES <= 0.01 * 1024 * 1024
+    assert stats["evictions"] == 10000 - stats["entries"]
+
+def test_depth_preferred_replacement():
+    '''
+    Test that a shallow entry does not replace a deeper one of the same search
+    '''
+    tt = TranspositionTable(size_mb=0.01)
+    buckets = tt.num_slots // 2
+    deep, shallow, other = 1, 1 + buckets, 1 + 2 * buckets  # same bucket
+    tt.store(deep, 6, 100)
+    tt.store(shallow, 1, 5)
+    tt.store(other, 2, 7)
+    assert tt.probe(deep)[0] == 100
+    assert tt.probe(shallow) is None
+    assert tt.probe(other)[0] == 7
+
+    # Entries of an older search can be replaced by any depth
+    tt.new_search()
+    tt.store(shallow, 1, 5)
+    assert tt.probe(shallow)[0] == 5
+    assert tt.probe(deep) is None
+
+def test_shared_table():
+    '''
+    Test that an attached shared table sees the entries of the table it attaches to
+    '''
+    tt = SharedTranspositionTable(size_mb=0.01)
+    try:
+        tt.store(12345, 3, -250.0, LOWER, 6)
+        other = pickle.loads(pickle.dumps(tt))
+        assert other.probe(12345) == (-250, 3, LOWER, 6)
+        other.store(777, 2, 80, UPPER, 1)
+        assert tt.probe(777) == (80, 2, UPPER, 1)
+        # A torn entry (data of another key) is rejected
+        slot = (777 & tt._bucket_mask) << 1
+        i = slot if tt._data[slot] else slot + 1
+        tt._data[i] ^= 1 << 40
+        assert tt.probe(777) is None
+        other.close()
+        tt.clear()
+        assert tt.probe(12345) is None
+    finally:
+        tt.close()
+
+def test_shared_table_released_when_collected():
+    '''
+    Test that a shared table dropped without close() removes its block
+    '''
+    tt = SharedTranspositionTable(size_mb=0.01)
+    name = tt.name
+    del tt
+    gc.collect()
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
@@ -0,0 +1,259 @@
+"""
+Fixed-size transposition table for the minimax search
+"""
+
+import weakref
+from array import array
+from multiprocessing import shared_memory
+
+# Depth stored for positions whose value does not depend on the depth (wins)
+MAX_DEPTH = 255
+
+# Bound types: the stored value is exact, a lower bound or an upper bound
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+NO_MOVE = -1
+
+_VALUE_OFFSET = 1 << 31
+_USED = 1 << 24
+
+
+class TranspositionTable:
+    """
+    Transposition table with a bounded memory budget
+
+    Entries are kept in two flat arrays of 64-bit words (key, packed data),
+    so the memory used never grows after construction. Each bucket has two
+    slots: slot 0 is depth-preferred (it keeps the deepest entry of the
+    current search) and slot 1 is always-replace.
+
+    Packed data layout:
+        bits 0-7: search depth
+        bits 8-9: bound type (EXACT, LOWER or UPPER)
+        bits 10-13: best move + 1 (0 if no move)
+        bits 16-23: age (search counter, used to replace stale entries)
+        bit 24: slot in use
+        bits 32-63: value + 2**31
+    """
+    ENTRY_BYTES = 16
+
+    def __init__(self, size_mb=16):
+        """
+        Initialize the table
+
+        Parameters:
+            size_mb: memory budget of the table in megabytes
+        """
+        entries = max(2, int(size_mb * 1024 * 1024) // self.ENTRY_BYTES)
+        buckets = 1
+        while buckets * 4 <= entries:
+            buckets *= 2
+        self.size_mb = size_mb
+        self.num_slots = 2 * buckets
+        self._bucket_mask = buckets - 1
+        self.age = 0
+        self.clear()
+
+    def new_search(self):
+        """
+        Start a new search: entries of previous searches become replaceable
+        """
+        self.age = (self.age + 1) & 0xFF
+
+    def clear(self):
+        """
+        Remove all the entries and reset the statistics
+        """
+        self._keys = array('Q', bytes(8 * self.num_slots))
+        self._data = array('Q', bytes(8 * self.num_slots))
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.used = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def probe(self, key):
+        """
+        Look up a position
+
+        Parameters:
+            key: 64-bit Zobrist key of the position
+
+        Returns:
+            tuple or None: (value, depth, bound type, best move), None if not found.
+            The best move is NO_MOVE when the entry has none.
+        """
+        self.probes += 1
+        slot = (key & self._bucket_mask) << 1
+        for i in (slot, slot + 1):
+            data = self._data[i]
+            if data and self._keys[i] == key:
+                self.hits += 1
+                return ((data >> 32) - _VALUE_OFFSET, data & 0xFF,
+                        (data >> 8) & 0x3, ((data >> 10) & 0xF) - 1)
+        return None
+
+    def store(self, key, depth, value, flag=EXACT, move=NO_MOVE):
+        """
+        Store the result of the search of a position
+
+        Parameters:
+            key: 64-bit Zobrist key of the position
+            depth: depth of the search below the position
+            value: value of the position
+            flag: bound type of the value (EXACT, LOWER or UPPER)
+            move: best move found (NO_MOVE if none)
+        """
+        self.stores += 1
+        data = (((int(value) + _VALUE_OFFSET) << 32) | _USED | (self.age << 16)
+                | ((move + 1) << 10) | (flag << 8) | min(depth, MAX_DEPTH))
+        slot = (key & self._bucket_mask) << 1
+        keys = self._keys
+        old = self._data[slot]
+        if (not old or keys[slot] == key or (old >> 16) & 0xFF != self.age
+                or depth >= (old & 0xFF)):
+            i = slot
+        else:
+            i = slot + 1
+            old = self._data[i]
+        if not old:
+            self.used += 1
+        elif keys[i] != key:
+            self.evictions += 1
+        keys[i] = key
+        self._data[i] = data
+
+    def __len__(self):
+        return self.used
+
+    def stats(self):
+        """
+        Usage statistics of the table
+
+        Returns:
+            dict: probes, hits, stores, evictions, entries and occupancy (0-1)
+        """
+        entries = self.used
+        return {
+            "probes": self.probes,
+            "hits": self.hits,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "entries": entries,
+            "occupancy": entries / self.num_slots,
+        }
+
+
+def _release_block(shm, views, unlink):
+    """
+    Release the views on a shared memory block, close it and remove it if `unlink`
+    """
+    for view in views:
+        view.release()
+    shm.close()
+    if unlink:
+        shm.unlink()
+
+
+class SharedTranspositionTable(TranspositionTable):
+    """
+    Transposition table in shared memory, used by several processes at once
+    (Lazy SMP)
+
+    The key and data arrays are views on one multiprocessing.shared_memory
+    block, with the same entries as TranspositionTable. Entries are written
+    without locks: the key word holds key ^ data, so an entry torn by two
+    processes writing the same slot no longer matches its key and is
+    ignored (lockless hashing). The statistics and entry count are those
+    of the current process.
+
+    Pickling the table (e.g. to send it to a worker process) attaches to
+    the same block instead of copying it. The block is released by close(),
+    or when the table is garbage collected.
+    """
+    def __init__(self, size_mb=16, name=None):
+        """
+        Create a table, or attach to an existing one
+
+        Parameters:
+            size_mb: memory budget of the table in megabytes
+            name: name of the shared memory block to attach to (None = create it)
+        """
+        self._shm = None
+        self._name = name
+        self._finalizer = None
+        super().__init__(size_mb)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    def __reduce__(self):
+        return (SharedTranspositionTable, (self.size_mb, self._shm.name))
+
+    def clear(self):
+        """
+        Remove all the entries (for every process) and reset the statistics
+        """
+        if self._shm is None:
+            size = 2 * 8 * self.num_slots
+            if self._name is None:
+                self._shm = shared_memory.SharedMemory(create=True, size=size)
+            else:
+                self._shm = shared_memory.SharedMemory(name=self._name)
+            self._words = self._shm.buf.cast('Q')
+            self._keys = self._words[:self.num_slots]
+            self._data = self._words[self.num_slots:2 * self.num_slots]
+            self._finalizer = weakref.finalize(self, _release_block, self._shm,
+                                               (self._keys, self._data, self._words), self._name is None)
+            if self._name is not None:
+                # Attached: keep the entries of the other processes
+                self._reset_stats()
+                return
+        self._shm.buf[:2 * 8 * self.num_slots] = bytes(2 * 8 * self.num_slots)
+        self._reset_stats()
+
+    def close(self):
+        """
+        Detach from the shared memory block, and remove it if this table created it
+        """
+        if self._shm is None:
+            return
+        self._finalizer()
+        self._shm = None
+
+    def probe(self, key):
+        self.probes += 1
+        slot = (key & self._bucket_mask) << 1
+        for i in (slot, slot + 1):
+            data = self._data[i]
+            if data and self._keys[i] ^ data == key:
+                self.hits += 1
+                return ((data >> 32) - _VALUE_OFFSET, data & 0xFF,
+                        (data >> 8) & 0x3, ((data >> 10) & 0xF) - 1)
+        return None
+
+    def store(self, key, depth, value, flag=EXACT, move=NO_MOVE):
+        self.stores += 1
+        data = (((int(value) + _VALUE_OFFSET) << 32) | _USED | (self.age << 16)
+                | ((move + 1) << 10) | (flag << 8) | min(depth, MAX_DEPTH))
+        slot = (key & self._bucket_mask) << 1
+        keys = self._keys
+        old = self._data[slot]
+        if (not old or keys[slot] ^ old == key or (old >> 16) & 0xFF != self.age
+                or depth >= (old & 0xFF)):
+            i = slot
+        else:
+            i = slot + 1
+            old = self._data[i]
+        if not old:
+            self.used += 1
+        elif keys[i] ^ old != key:
+            self.evictions += 1
+        keys[i] = key ^ data
+        self._data[i] = data
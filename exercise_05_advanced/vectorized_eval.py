@@ -0,0 +1,200 @@
+"""
+Vectorized NumPy evaluation of Connect Four boards
+
+Every function accepts one board (6, 7, 2) or a stack of boards (N, 6, 7, 2)
+and computes the window counts with shifted slices of padded planes, so a
+whole batch is scored without any Python loop over the cells. The scores
+are the same as `MinimaxAgent._evaluate`.
+"""
+
+import numpy as np
+
+ROWS = 6
+COLS = 7
+PAD = 3
+
+DIRECTIONS = [(0, 1), (1, 0), (1, 1), (1, -1)]
+
+# Cell weights of the positional term, also used by MinimaxAgent
+POSITION_WEIGHTS = np.array([
+    [10, 10 , 10 , 10 , 10 , 10 , 10],
+    [10, 50 , 50 , 50 , 50 , 50 , 10],
+    [10, 50 , 100, 200, 100, 50 , 10],
+    [25, 50 , 100, 300, 100, 50 , 25],
+    [50, 100, 200, 300, 200, 100, 50],
+    [75, 100, 200, 300, 200, 100, 75],
+])
+
+
+def _as_batch(boards):
+    """
+    Return the boards as a bool array (N, 6, 7, 2) and whether a single board was given
+    """
+    boards = np.asarray(boards)
+    single = boards.ndim == 3
+    if single:
+        boards = boards[np.newaxis]
+    return boards != 0, single
+
+
+def _pad(planes):
+    """
+    Pad (N, 6, 7) planes with PAD cells of False on every side
+    """
+    return np.pad(planes, ((0, 0), (PAD, PAD), (PAD, PAD)))
+
+
+def _cells(padded, dr, dc, i):
+    """
+    For every cell (r, c) of the board, the value of the cell (r + i*dr, c + i*dc)
+    (False outside the board)
+    """
+    r = PAD + dr * i
+    c = PAD + dc * i
+    return padded[:, r:r + ROWS, c:c + COLS]
+
+
+def count_two_in_row(planes):
+    """
+    Number of two-in-a-row per board, as `MinimaxAgent._count_two_in_row`
+
+    Parameters:
+        planes: bool array (N, 6, 7) of the pieces of one player
+
+    Returns:
+        numpy array (N,)
+    """
+    padded = _pad(planes)
+    count = np.zeros(planes.shape[0], dtype=np.int64)
+    for dr, dc in DIRECTIONS:
+        count += (_cells(padded, dr, dc, 0) & _cells(padded, dr, dc, 1)).sum(axis=(1, 2))
+    return count
+
+
+def count_three_in_row(planes, empty):
+    """
+    Number of three-in-a-row with an empty end per board, as `MinimaxAgent._count_three_in_row`
+
+    Parameters:
+        planes: bool array (N, 6, 7) of the pieces of one player
+        empty: bool array (N, 6, 7) of the empty cells
+
+    Returns:
+        numpy array (N,)
+    """
+    padded = _pad(planes)
+    padded_empty = _pad(empty)
+    count = np.zeros(planes.shape[0], dtype=np.int64)
+    for dr, dc in DIRECTIONS:
+        three = _cells(padded, dr, dc, 0) & _cells(padded, dr, dc, 1) & _cells(padded, dr, dc, 2)
+        open_end = _cells(padded_empty, dr, dc, -1) | _cells(padded_empty, dr, dc, 3)
+        count += (three & open_end).sum(axis=(1, 2))
+    return count
+
+
+def check_win(planes):
+    """
+    Whether each board has a four-in-a-row, as `MinimaxAgent._check_win`
+
+    Parameters:
+        planes: bool array (N, 6, 7) of the pieces of one player
+
+    Returns:
+        bool numpy array (N,)
+    """
+    padded = _pad(planes)
+    win = np.zeros(planes.shape[0], dtype=bool)
+    for dr, dc in DIRECTIONS:
+        four = (_cells(padded, dr, dc, 0) & _cells(padded, dr, dc, 1)
+                & _cells(padded, dr, dc, 2) & _cells(padded, dr, dc, 3))
+        win |= four.any(axis=(1, 2))
+    return win
+
+
+def winning_cells(planes, empty):
+    """
+    Empty cells that would complete a four-in-a-row
+
+    Parameters:
+        planes: bool array (N, 6, 7) of the pieces of one player
+        empty: bool array (N, 6, 7) of the empty cells
+
+    Returns:
+        bool numpy array (N, 6, 7)
+    """
+    padded = _pad(planes)
+    threats = np.zeros_like(padded)
+    for dr, dc in DIRECTIONS:
+        window = [_cells(padded, dr, dc, i) for i in range(4)]
+        for j in range(4):
+            others = np.ones_like(window[0])
+            for i in range(4):
+                if i != j:
+                    others = others & window[i]
+            _cells(threats, dr, dc, j)[...] |= others
+    return threats[:, PAD:PAD + ROWS, PAD:PAD + COLS] & empty
+
+
+def playable_cells(empty):
+    """
+    Empty cells where a piece would land (bottom row or a piece below)
+
+    Parameters:
+        empty: bool array (N, 6, 7) of the empty cells
+
+    Returns:
+        bool numpy array (N, 6, 7)
+    """
+    below_filled = np.ones_like(empty)
+    below_filled[:, :-1, :] = ~empty[:, 1:, :]
+    return empty & below_filled
+
+
+def evaluate_boards(boards, position_weights=POSITION_WEIGHTS):
+    """
+    Evaluate one board or a stack of boards with the scoring of `MinimaxAgent._evaluate`
+
+    Parameters:
+        boards: numpy array (6, 7, 2) or (N, 6, 7, 2), channel 0 = us
+        position_weights: (6, 7) weights of the cells
+
+    Returns:
+        float for a single board, numpy array (N,) of floats for a stack
+    """
+    boards, single = _as_batch(boards)
+    mine = boards[..., 0]
+    opp = boards[..., 1]
+    empty = ~(mine | opp)
+
+    score = np.zeros(boards.shape[0], dtype=np.int64)
+    opp_can_win = (winning_cells(opp, empty) & playable_cells(empty)).any(axis=(1, 2))
+    score -= 5000 * opp_can_win
+    score += 200 * count_three_in_row(mine, empty) - 50 * count_three_in_row(opp, empty)
+    score += 20 * count_two_in_row(mine) - 10 * count_two_in_row(opp)
+    weights = np.asarray(position_weights)
+    score += (mine * weights).sum(axis=(1, 2)) - (opp * weights).sum(axis=(1, 2))
+
+    score = np.where(check_win(opp), -100000, score)
+    score = np.where(check_win(mine), 100000, score)
+    score = score.astype(float)
+    return float(score[0]) if single else score
+
+
+def child_boards(board, channel):
+    """
+    Stack the boards reached by every valid move of `channel`
+
+    Parameters:
+        board: numpy array (6, 7, 2)
+        channel: 0 for current player, 1 for opponent
+
+    Returns:
+        tuple: (list of columns, numpy array (len(columns), 6, 7, 2))
+    """
+    occupied = (board[:, :, 0] != 0) | (board[:, :, 1] != 0)
+    heights = occupied.sum(axis=0)
+    columns = [c for c in range(COLS) if heights[c] < ROWS]
+    children = np.repeat(np.asarray(board)[np.newaxis], len(columns), axis=0)
+    for i, col in enumerate(columns):
+        children[i, ROWS - 1 - heights[col], col, channel] = 1
+    return columns, children